@@ -0,0 +1,136 @@
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Callable, Generator, Iterable, Self
+
+from pydantic import TypeAdapter
+
+from src.validators import Date, Datetime, FnetDocumento
+
+# Anything but the exact type falls back to pydantic, so the batch accepts and rejects the
+# same values `FnetDocumento` does.
+DATETIME_ADAPTER: TypeAdapter[datetime] = TypeAdapter(Datetime)
+DATE_ADAPTER: TypeAdapter[date] = TypeAdapter(Date)
+INT_ADAPTER: TypeAdapter[int] = TypeAdapter(int)
+BOOL_ADAPTER: TypeAdapter[bool] = TypeAdapter(bool)
+
+
+# Pages repeat the same dates, so validated strings are cached.
+@lru_cache(maxsize=4096)
+def validate_datetime_string(value: str) -> datetime:
+    return DATETIME_ADAPTER.validate_python(value)
+
+
+@lru_cache(maxsize=4096)
+def validate_date_string(value: str) -> date:
+    return DATE_ADAPTER.validate_python(value)
+
+
+def to_datetime(value: Any) -> datetime:
+    if isinstance(value, str):
+        return validate_datetime_string(value)
+    return DATETIME_ADAPTER.validate_python(value)
+
+
+def to_date(value: Any) -> date:
+    if isinstance(value, str):
+        return validate_date_string(value)
+    return DATE_ADAPTER.validate_python(value)
+
+
+def to_str(value: Any) -> str:
+    if not isinstance(value, str):
+        raise TypeError(f"Expected a string, got {value!r}")
+    return value
+
+
+def to_int(value: Any) -> int:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return INT_ADAPTER.validate_python(value)
+
+
+def to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    return BOOL_ADAPTER.validate_python(value)
+
+
+FIELD_ALIASES = {name: field.alias or name for name, field in FnetDocumento.model_fields.items()}
+
+COLUMN_CONVERTERS: dict[str, Callable[[Any], Any]] = {name: to_str for name in FIELD_ALIASES} | {
+    "document_id": to_int,
+    "data_referencia": to_date,
+    "data_entrega": to_datetime,
+    "alta_prioridade": to_bool,
+    "versao": to_int,
+    "id_template": to_int,
+    "id_select_item_convenio": to_int,
+    "indicador_fundo_ativo_b3": to_bool,
+}
+
+
+class FnetDocumentoBatch:
+    """A page of FNET documents stored as one typed list per column.
+
+    Built straight from the `data` array of the API response, without creating a pydantic model
+    per document. Individual documents are still available as `FnetDocumento` by indexing.
+
+    Examples:
+        >>> batch = FnetDocumentoBatch.from_api_records(page_data["data"])
+        >>> batch.columns["document_id"][:2]
+        [512345, 512346]
+        >>> batch[0]
+        FnetDocumento(document_id=512345, ...)
+    """
+
+    __slots__ = ("columns", "size")
+
+    COLUMNS = tuple(FIELD_ALIASES)
+
+    def __init__(self, columns: dict[str, list[Any]]):
+        sizes = {len(values) for values in columns.values()}
+        if len(sizes) > 1:
+            raise ValueError(f"Columns have different lengths: {sorted(sizes)}")
+
+        self.columns = columns
+        self.size = sizes.pop() if sizes else 0
+
+    @classmethod
+    def from_api_records(cls, records: Iterable[dict[str, Any]]) -> Self:
+        """Build a batch from the raw API records, keeping the last record of repeated ids.
+
+        Raises:
+            KeyError: If a record is missing one of the expected fields.
+            TypeError | ValueError: If a value can't be converted to the column type.
+        """
+        unique_records = list({record["id"]: record for record in records}.values())
+        columns = {
+            name: [COLUMN_CONVERTERS[name](record[alias]) for record in unique_records]
+            for name, alias in FIELD_ALIASES.items()
+        }
+        return cls(columns)
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[FnetDocumento]) -> Self:
+        documents = list(documents)
+        return cls({name: [getattr(doc, name) for doc in documents] for name in cls.COLUMNS})
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: int) -> FnetDocumento:
+        return FnetDocumento.model_construct(
+            **{name: values[index] for name, values in self.columns.items()}
+        )
+
+    def __iter__(self) -> Generator[FnetDocumento, None, None]:
+        for index in range(self.size):
+            yield self[index]
+
+    def iter_rows(self) -> Iterable[tuple]:
+        """Yield each document as a tuple ordered like `COLUMNS`."""
+        return zip(*(self.columns[name] for name in self.COLUMNS))
+
+    def to_records(self) -> list[dict[str, Any]]:
+        """Return the rows as parameter dicts, the format SQLAlchemy expects for `executemany`."""
+        return [dict(zip(self.COLUMNS, row)) for row in self.iter_rows()]
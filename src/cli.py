@@ -0,0 +1,107 @@
+import argparse
+import importlib
+from datetime import date
+from pathlib import Path
+from typing import Sequence
+
+from src.metrics import add_metrics_arguments
+from src.profiling import add_profiling_arguments
+
+
+def database_parser(default: str | None = None) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument(
+        "--database-url",
+        default=default,
+        help="SQLAlchemy URL, e.g. sqlite:///fiis.db or duckdb:///fiis.duckdb. "
+        "Defaults to DATABASE_URL or the POSTGRES_* settings.",
+    )
+    return parser
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the `fiis` parser.
+
+    Subcommands only name their handler as `module:function`. The handler module, and with it
+    pandas, SQLAlchemy and the settings, is imported once the command actually runs.
+    """
+    parser = argparse.ArgumentParser(
+        prog="fiis", description="FNET data pipelines.", parents=[database_parser()]
+    )
+    # Accepted after the subcommand too, which is how the `python -m` entry points pass it.
+    # SUPPRESS keeps the subcommand from resetting a URL given before it.
+    common = database_parser(default=argparse.SUPPRESS)
+    subparsers = parser.add_subparsers(dest="command", required=True, metavar="COMMAND")
+
+    sync = subparsers.add_parser(
+        "sync", help="Sync FNET documents into the database.", parents=[common]
+    )
+    sync.add_argument(
+        "--changelog", type=Path, help="Append inserted and changed documents to this NDJSON log."
+    )
+    sync.add_argument(
+        "--no-notify", action="store_true", help="Don't send Postgres NOTIFY change events."
+    )
+    add_metrics_arguments(sync)
+    add_profiling_arguments(sync)
+    sync.set_defaults(handler="src.documentos.sync:run")
+
+    download = subparsers.add_parser(
+        "download", help="Download the stored documents as XML.", parents=[common]
+    )
+    download.add_argument("--output", type=Path, default=Path("rendimentos"))
+    download.add_argument("--limit", type=int, help="Stop after this many documents.")
+    add_metrics_arguments(download)
+    add_profiling_arguments(download)
+    download.set_defaults(handler="src.documentos.download:run")
+
+    rendimentos = subparsers.add_parser(
+        "rendimentos", help="Summarise the downloaded rendimentos reports.", parents=[common]
+    )
+    rendimentos.add_argument("--path", type=Path, default=Path("rendimentos"))
+    rendimentos.add_argument(
+        "--store", action="store_true", help="Upsert the dividends into the database."
+    )
+    rendimentos.add_argument(
+        "--output", type=Path, help="Write the summary of each fund trading code as CSV."
+    )
+    add_metrics_arguments(rendimentos)
+    add_profiling_arguments(rendimentos)
+    rendimentos.set_defaults(handler="src.rendimentos.rendimentos:run")
+
+    export = subparsers.add_parser("export", help="Export fnet_documento as CSV.", parents=[common])
+    export.add_argument("--output", type=Path, default=Path("-"), help="File path or - (stdout).")
+    export.add_argument(
+        "--since", type=date.fromisoformat, help="Only documents delivered on or after YYYY-MM-DD."
+    )
+    add_metrics_arguments(export)
+    export.set_defaults(handler="src.documentos.export:run")
+
+    benchmark = subparsers.add_parser(
+        "benchmark",
+        help="Compare bulk upsert and scan throughput across database backends.",
+        parents=[common],
+    )
+    benchmark.add_argument(
+        "--url", action="append", help="Database URL to benchmark, can be repeated."
+    )
+    benchmark.add_argument("--documents", type=int, default=20_000)
+    benchmark.add_argument("--batch-size", type=int, default=200)
+    benchmark.set_defaults(handler="src.database.benchmark:run")
+
+    return parser
+
+
+def load_handler(path: str):
+    """Import the handler of a subcommand from its `module:function` path."""
+    module_name, function_name = path.split(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def main(argv: Sequence[str] | None = None):
+    args = build_parser().parse_args(argv)
+    load_handler(args.handler)(args)
+
+
+if __name__ == "__main__":
+    main()
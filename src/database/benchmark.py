@@ -0,0 +1,114 @@
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete, func, select
+
+from src.batch import FnetDocumentoBatch
+from src.database.models import FnetDocumentoModel, bulk_upsert_fnet_documentos
+from src.database.partitions import ensure_partitions
+from src.database.utils import create_db_connection, get_db_engine
+
+BENCHMARK_START = datetime(2023, 1, 1)
+DOCUMENT_TYPES = ("Rendimentos e Amortizações", "Relatório Gerencial", "Informe Mensal")
+
+
+def make_api_records(count: int, version: int = 1) -> list[dict[str, Any]]:
+    """Build synthetic API records. Ids are negative so they never collide with real ones."""
+    records = []
+    for index in range(count):
+        delivered_at = BENCHMARK_START + timedelta(minutes=index)
+        records.append(
+            {
+                "id": -(index + 1),
+                "descricaoFundo": f"FII BENCHMARK {index % 500}",
+                "categoriaDocumento": "Aviso aos Cotistas - Estruturado",
+                "tipoDocumento": DOCUMENT_TYPES[index % len(DOCUMENT_TYPES)],
+                "dataReferencia": delivered_at.strftime("%d/%m/%Y"),
+                "dataEntrega": delivered_at.strftime("%d/%m/%Y %H:%M"),
+                "status": "AC",
+                "descricaoStatus": "Ativo com visualização",
+                "analisado": "N",
+                "situacaoDocumento": "A",
+                "altaPrioridade": False,
+                "formatoDataReferencia": "3",
+                "versao": version,
+                "modalidade": "AP",
+                "descricaoModalidade": "Apresentação",
+                "nomePregao": f"BENCH{index % 500:03d}",
+                "informacoesAdicionais": f"BNCH{index % 500:03d}11;",
+                "idTemplate": 0,
+                "idSelectItemConvenio": 0,
+                "indicadorFundoAtivoB3": True,
+            }
+        )
+    return records
+
+
+def time_upserts(engine, batches: list[FnetDocumentoBatch]) -> float:
+    start = time.perf_counter()
+    with create_db_connection(engine) as db_session:
+        for batch in batches:
+            bulk_upsert_fnet_documentos(db_session, batch)
+            db_session.commit()
+    return time.perf_counter() - start
+
+
+def benchmark_backend(database_url: str, documents: int, batch_size: int) -> dict[str, Any]:
+    """Measure bulk upsert and range scan throughput of one backend.
+
+    The synthetic documents are deleted at the end, so it is safe to point this at a database
+    that already holds real data.
+    """
+    engine = get_db_engine(database_url)
+    ensure_partitions(engine)
+
+    def make_batches(version: int) -> list[FnetDocumentoBatch]:
+        records = make_api_records(documents, version)
+        return [
+            FnetDocumentoBatch.from_api_records(records[index : index + batch_size])
+            for index in range(0, documents, batch_size)
+        ]
+
+    table = FnetDocumentoModel.__table__
+    try:
+        insert_seconds = time_upserts(engine, make_batches(version=1))
+        unchanged_seconds = time_upserts(engine, make_batches(version=1))
+        update_seconds = time_upserts(engine, make_batches(version=2))
+
+        scan = (
+            select(table.c.tipo_documento, func.count())
+            .where(table.c.document_id < 0)
+            .where(table.c.data_entrega >= BENCHMARK_START + timedelta(minutes=documents // 4))
+            .where(table.c.data_entrega < BENCHMARK_START + timedelta(minutes=documents // 2))
+            .group_by(table.c.tipo_documento)
+        )
+        start = time.perf_counter()
+        with engine.connect() as connection:
+            connection.execute(scan).all()
+        scan_seconds = time.perf_counter() - start
+    finally:
+        with engine.begin() as connection:
+            connection.execute(delete(table).where(table.c.document_id < 0))
+        engine.dispose()
+
+    return {
+        "backend": engine.url.get_backend_name(),
+        "documents": documents,
+        "insert_docs_per_second": round(documents / insert_seconds),
+        "unchanged_docs_per_second": round(documents / unchanged_seconds),
+        "update_docs_per_second": round(documents / update_seconds),
+        "range_scan_ms": round(scan_seconds * 1000, 2),
+    }
+
+
+def run(args: argparse.Namespace):
+    """Entry point of `fiis benchmark`."""
+    database_urls = args.url or [args.database_url]
+    results = [
+        benchmark_backend(database_url, args.documents, args.batch_size)
+        for database_url in database_urls
+    ]
+    print(json.dumps(results, indent=2))
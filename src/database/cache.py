@@ -0,0 +1,129 @@
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Hashable, Iterable, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from src.database.changefeed import CHANNEL, RENDIMENTO_CHANNEL, listen_notifications
+from src.logger import configure_logger
+from src.metrics import metrics
+
+DEFAULT_MAXSIZE = 1024
+DEFAULT_TTL = 60.0
+
+logger = configure_logger("fiis_query_cache")
+
+T = TypeVar("T")
+
+
+class QueryCache:
+    """Thread-safe in-process LRU cache whose entries also expire after `ttl` seconds.
+
+    Entries are dropped all at once by `invalidate()`, which is wired to the commits of
+    writing sessions (`attach`) and to the NOTIFY channels of `fnet_documento` and
+    `fii_rendimento` (`listen_for_changes`).
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: float = DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        """Return `(True, value)` on a hit and `(False, None)` on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return False, None
+
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *args):
+        with self._lock:
+            self._entries.clear()
+        metrics.increment("fiis_query_cache_invalidations_total")
+
+    def attach(self, session: Session):
+        """Invalidate the cache whenever `session` commits."""
+        event.listen(session, "after_commit", self.invalidate)
+
+    def listen_for_changes(
+        self, engine: Engine, channels: Iterable[str] = (CHANNEL, RENDIMENTO_CHANNEL)
+    ) -> threading.Thread:
+        """Invalidate the cache on every document or dividend change published via NOTIFY."""
+
+        def run():
+            try:
+                for _ in listen_notifications(engine, channels):
+                    self.invalidate()
+            except Exception as e:
+                logger.error(f"Stopped listening for changes: {e}")
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+
+def cached_query(cache: QueryCache) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Cache a query function taking the session as its first argument.
+
+    The key is the function, the database URL and the remaining arguments bound to the
+    signature with their defaults applied, so positional, keyword and omitted-default calls
+    share an entry. Calls with unhashable arguments skip the cache. Hits return the cached
+    object itself, so cached values must be immutable. The uncached function stays reachable
+    through `__wrapped__`.
+    """
+
+    def decorator(function: Callable[..., T]) -> Callable[..., T]:
+        signature = inspect.signature(function)
+
+        @wraps(function)
+        def wrapper(session: Session, *args, **kwargs) -> T:
+            arguments = signature.bind(session, *args, **kwargs)
+            arguments.apply_defaults()
+            key = (
+                function.__qualname__,
+                str(session.get_bind().engine.url),
+                tuple(arguments.arguments.items())[1:],
+            )
+            try:
+                hash(key)
+            except TypeError:
+                metrics.increment("fiis_query_cache_skipped_total")
+                return function(session, *args, **kwargs)
+
+            hit, value = cache.get(key)
+            if hit:
+                metrics.increment("fiis_query_cache_hits_total")
+                return value
+
+            metrics.increment("fiis_query_cache_misses_total")
+            value = function(session, *args, **kwargs)
+            cache.set(key, value)
+            return value
+
+        return wrapper
+
+    return decorator
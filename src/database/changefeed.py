@@ -0,0 +1,294 @@
+import argparse
+import json
+import os
+import select
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Generator, Iterable, Literal
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import event, func, text
+from sqlalchemy import select as sql_select
+from sqlalchemy.engine import Engine, Row
+from sqlalchemy.orm import Session
+
+from src.database.models import CHANGE_FEED_COLUMNS, FnetDocumentoModel
+from src.logger import configure_logger
+
+CHANNEL = "fnet_documento_changes"
+RENDIMENTO_CHANNEL = "fii_rendimento_changes"
+
+logger = configure_logger("fnet_documento_changefeed")
+
+
+class DocumentChange(BaseModel):
+    operation: Literal["insert", "update"]
+    document_id: int
+    versao: int
+    tipo_documento: str
+    nome_pregao: str
+    changed_at: datetime | None = None
+
+    model_config = ConfigDict(extra="ignore")
+
+    @classmethod
+    def from_row(cls, row: Any) -> "DocumentChange":
+        """Build the change from a row holding `CHANGE_FEED_COLUMNS`."""
+        return cls(
+            operation="insert" if row.last_update is None else "update",
+            document_id=row.document_id,
+            versao=row.versao,
+            tipo_documento=row.tipo_documento,
+            nome_pregao=row.nome_pregao,
+            changed_at=row.last_update or row.inserted_at,
+        )
+
+
+def changes_from_result(rows: Iterable[Row] | None) -> list[DocumentChange]:
+    """Turn the rows returned by the `fnet_documento` upsert into change events."""
+    if rows is None:
+        return []
+
+    return [DocumentChange.from_row(row) for row in rows]
+
+
+def fetch_changes_since(session: Session, since: datetime) -> list[DocumentChange]:
+    """Fetch the documents inserted or updated at or after `since`, oldest change first."""
+    table = FnetDocumentoModel.__table__
+    changed_at = func.coalesce(table.c.last_update, table.c.inserted_at)
+    query = (
+        sql_select(*(table.c[column] for column in CHANGE_FEED_COLUMNS))
+        .where(changed_at >= since)
+        .order_by(changed_at, table.c.document_id)
+    )
+    return [DocumentChange.from_row(row) for row in session.execute(query)]
+
+
+def notify_changes(session: Session, changes: list[DocumentChange], channel: str = CHANNEL):
+    """Queue one NOTIFY per change. Postgres only delivers them if the transaction commits."""
+    if not changes:
+        return
+
+    session.connection().execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        [{"channel": channel, "payload": change.model_dump_json()} for change in changes],
+    )
+
+
+def notify_rendimentos(
+    session: Session, document_ids: list[int], channel: str = RENDIMENTO_CHANNEL
+):
+    """Queue one NOTIFY per stored dividend, carrying its document id as the payload."""
+    if not document_ids:
+        return
+
+    session.connection().execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        [{"channel": channel, "payload": str(document_id)} for document_id in document_ids],
+    )
+
+
+class ChangeLog:
+    """Append-only NDJSON log of document changes with per-consumer offsets.
+
+    Offsets are byte positions in the log, stored in `<log>.offsets/<consumer>`. A consumer
+    reads from its offset and commits the offset returned with the last event it processed.
+    Delivery is at least once: after a crash `ChangeFeed.recover` may append an event again,
+    so consumers should treat `(document_id, versao, changed_at)` as idempotent.
+
+    Usage:
+        changelog = ChangeLog(Path("changes.ndjson"))
+        for offset, change in changelog.read("dashboard"):
+            handle(change)
+            changelog.commit("dashboard", offset)
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.offsets_dir = path.with_name(f"{path.name}.offsets")
+
+    def append(self, changes: Iterable[DocumentChange]):
+        lines = "".join(change.model_dump_json() + "\n" for change in changes)
+        if not lines:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as log:
+            log.write(lines)
+            log.flush()
+            os.fsync(log.fileno())
+
+    def iter_reversed(self, chunk_size: int = 64 * 1024) -> Generator[DocumentChange, None, None]:
+        """Yield the complete events of the log, newest first."""
+        if not self.path.exists():
+            return
+
+        with self.path.open("rb") as log:
+            end = log.seek(0, os.SEEK_END)
+            found_last_newline = False
+            carry = b""
+            while end > 0:
+                start = max(0, end - chunk_size)
+                log.seek(start)
+                lines = (log.read(end - start) + carry).split(b"\n")
+                end = start
+                if not found_last_newline:
+                    # Whatever follows the last newline is empty or a line still being written.
+                    carry = b""
+                    if len(lines) == 1:
+                        continue
+                    lines.pop()
+                    found_last_newline = True
+                # The first piece may continue a line starting in the previous chunk.
+                carry = lines.pop(0) if start else b""
+                for line in reversed(lines):
+                    yield DocumentChange.model_validate_json(line)
+
+    def last_changes(self) -> list[DocumentChange]:
+        """Return the events sharing the `changed_at` of the newest event in the log."""
+        changes: list[DocumentChange] = []
+        for change in self.iter_reversed():
+            if changes and change.changed_at != changes[0].changed_at:
+                break
+            changes.append(change)
+        return changes
+
+    def offset(self, consumer: str) -> int:
+        try:
+            return int((self.offsets_dir / consumer).read_text())
+        except FileNotFoundError:
+            return 0
+
+    def commit(self, consumer: str, offset: int):
+        self.offsets_dir.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.offsets_dir / f".{consumer}.tmp"
+        temporary_path.write_text(str(offset))
+        os.replace(temporary_path, self.offsets_dir / consumer)
+
+    def read(
+        self, consumer: str, limit: int | None = None
+    ) -> Generator[tuple[int, DocumentChange], None, None]:
+        """Yield `(offset_after_event, change)` for the events the consumer hasn't committed."""
+        if not self.path.exists():
+            return
+
+        with self.path.open("rb") as log:
+            log.seek(self.offset(consumer))
+            for count, line in enumerate(iter(log.readline, b""), 1):
+                if not line.endswith(b"\n"):
+                    break  # partially written line, picked up on the next read
+                yield log.tell(), DocumentChange.model_validate_json(line)
+                if limit and count >= limit:
+                    break
+
+
+class ChangeFeed:
+    """Publish the changes written by the upsert to LISTEN/NOTIFY and to a `ChangeLog`.
+
+    Notifications go out inside the write transaction. Log entries are buffered and only
+    appended once the session commits, and dropped if it rolls back, so consumers never see
+    uncommitted changes.
+
+    If the process dies between the commit and the append, the upsert won't return those rows
+    again since they are now unchanged. Call `recover` before syncing to append the changes
+    committed after the newest logged event.
+    """
+
+    def __init__(self, changelog: ChangeLog | None = None, notify: bool = True):
+        self.changelog = changelog
+        self.notify = notify
+        self.pending: list[DocumentChange] = []
+
+    def attach(self, session: Session):
+        event.listen(session, "after_commit", self.flush)
+        event.listen(session, "after_rollback", self.discard)
+
+    def publish(self, session: Session, rows: Iterable[Row] | None) -> list[DocumentChange]:
+        changes = changes_from_result(rows)
+        if self.notify and session.get_bind().dialect.name == "postgresql":
+            notify_changes(session, changes)
+        if self.changelog:
+            self.pending.extend(changes)
+        return changes
+
+    def recover(self, session: Session) -> list[DocumentChange]:
+        """Append the changes committed after the newest event of the log but missing from it.
+
+        A fresh log has nothing to compare against, so no changes are recovered for it.
+        """
+        last_changes = self.changelog.last_changes() if self.changelog else []
+        if not last_changes or last_changes[0].changed_at is None:
+            return []
+
+        logged = {(change.document_id, change.versao) for change in last_changes}
+        changes = [
+            change
+            for change in fetch_changes_since(session, last_changes[0].changed_at)
+            if change.changed_at != last_changes[0].changed_at
+            or (change.document_id, change.versao) not in logged
+        ]
+        if changes:
+            logger.warning(f"Recovered {len(changes)} changes missing from the change log.")
+            self.changelog.append(changes)  # type: ignore[union-attr]
+        return changes
+
+    def flush(self, session: Session | None = None):
+        if self.changelog and self.pending:
+            self.changelog.append(self.pending)
+        self.pending = []
+
+    def discard(self, session: Session | None = None):
+        self.pending = []
+
+
+def listen_notifications(
+    engine: Engine, channels: Iterable[str], timeout: float = 5.0
+) -> Generator[Any, None, None]:
+    """Block on LISTEN and yield the raw notifications of `channels` as Postgres delivers them.
+
+    The connection is detached from the pool, since the pool reset wouldn't undo autocommit
+    or the LISTEN, and closed for good when the consumer stops.
+    """
+    connection = engine.raw_connection()
+    connection.detach()
+    try:
+        connection.set_isolation_level(0)  # autocommit, required to receive notifications
+        with connection.cursor() as cursor:
+            for channel in channels:
+                cursor.execute(f'LISTEN "{channel}"')
+
+        dbapi_connection = connection.dbapi_connection
+        while True:
+            if select.select([dbapi_connection], [], [], timeout) == ([], [], []):
+                continue
+            dbapi_connection.poll()
+            while dbapi_connection.notifies:
+                yield dbapi_connection.notifies.pop(0)
+    finally:
+        connection.close()
+
+
+def listen(
+    engine: Engine, channel: str = CHANNEL, timeout: float = 5.0
+) -> Generator[DocumentChange, None, None]:
+    """Block on LISTEN and yield the changes as Postgres delivers them."""
+    for notification in listen_notifications(engine, [channel], timeout):
+        yield DocumentChange.model_validate_json(notification.payload)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consume the fnet_documento change feed.")
+    parser.add_argument("--changelog", type=Path, help="Read new events from this NDJSON log.")
+    parser.add_argument("--consumer", default="default", help="Consumer name for the offsets.")
+    args = parser.parse_args()
+
+    if args.changelog:
+        changelog = ChangeLog(args.changelog)
+        for offset, change in changelog.read(args.consumer):
+            print(json.dumps(change.model_dump(), ensure_ascii=False))
+            changelog.commit(args.consumer, offset)
+    else:
+        from src.database.utils import get_db_engine
+
+        for change in listen(get_db_engine()):
+            print(json.dumps(change.model_dump(), ensure_ascii=False))
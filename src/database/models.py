@@ -1,21 +1,28 @@
 from datetime import datetime
+from typing import Iterable, Sequence
 
 from sqlalchemy import (
     Boolean,
     Column,
     Date,
     DateTime,
+    Index,
     Integer,
+    Numeric,
+    PrimaryKeyConstraint,
     String,
-    UniqueConstraint,
     func,
+    or_,
 )
-from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy.engine import CursorResult
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import CursorResult, Dialect, Row
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
 
-from src.validators import FnetDocumento
+from src.batch import FnetDocumentoBatch
+from src.validators import DadosEconomicoFinanceiros, FnetDocumento
 
 Base = declarative_base()
 
@@ -23,7 +30,6 @@ Base = declarative_base()
 class FnetDocumentoModel(Base):
     __tablename__ = "fnet_documento"
 
-    pk_id = Column(Integer, primary_key=True, autoincrement=True)
     document_id = Column(Integer, nullable=False)
     descricao_fundo = Column(String, nullable=False)
     categoria_documento = Column(String, nullable=False)
@@ -47,22 +53,171 @@ class FnetDocumentoModel(Base):
     inserted_at = Column(DateTime, default=func.now())
     last_update = Column(DateTime, onupdate=func.now())
 
+    # Partitioned tables only accept unique constraints that contain the partition key, so the
+    # natural key doubles as the primary key. A document id maps to a single delivery, which
+    # keeps `data_entrega` stable across upserts of the same document.
     __table_args__ = (
-        UniqueConstraint("document_id", "data_referencia", name="uq_document_data_ref"),
+        PrimaryKeyConstraint(
+            "document_id", "data_referencia", "data_entrega", name="pk_fnet_documento"
+        ),
+        Index(
+            "ix_fnet_documento_data_entrega_brin", "data_entrega", postgresql_using="brin"
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_fnet_documento_data_referencia_brin", "data_referencia", postgresql_using="brin"
+        ).ddl_if(dialect="postgresql"),
+        # Serves the keyset pagination of the read API; DuckDB relies on its zone maps instead.
+        Index("ix_fnet_documento_data_entrega_id", "data_entrega", "document_id").ddl_if(
+            dialect=("postgresql", "sqlite")
+        ),
+        # Serves the change feed recovery, which looks up documents by their last change.
+        Index(
+            "ix_fnet_documento_changed_at",
+            func.coalesce(last_update, inserted_at),
+            "document_id",
+        ).ddl_if(dialect=("postgresql", "sqlite")),
+        {"postgresql_partition_by": "RANGE (data_entrega)"},
     )
 
 
+class RendimentoModel(Base):
+    __tablename__ = "fii_rendimento"
+
+    document_id = Column(Integer, primary_key=True, autoincrement=False)
+    cnpj_fundo = Column(String, nullable=False)
+    nome_fundo = Column(String, nullable=False)
+    cod_negociacao_cota = Column(String, nullable=False)
+    ato_societario_aprovacao = Column(String)
+    data_aprovacao = Column(DateTime)
+    data_base = Column(Date, nullable=False)
+    data_pagamento = Column(Date, nullable=False)
+    valor_provento_cota = Column(Numeric(18, 8), nullable=False)
+    periodo_referencia = Column(String, nullable=False)
+    ano = Column(String, nullable=False)
+    rendimento_isento_ir = Column(Boolean, nullable=False)
+    inserted_at = Column(DateTime, default=func.now())
+    last_update = Column(DateTime, onupdate=func.now())
+
+    __table_args__ = (
+        Index(
+            "ix_fii_rendimento_cota_data_base", "cod_negociacao_cota", "data_base", "document_id"
+        ),
+    )
+
+
+@compiles(CreateTable, "duckdb")
+def compile_duckdb_create_table(create, compiler, **kw):
+    # duckdb_engine reuses the Postgres DDL compiler, which would emit `PARTITION BY`.
+    compiler.post_create_table = lambda table: ""
+    return compiler.visit_create_table(create, **kw)
+
+
+def dialect_insert(dialect: Dialect):
+    """Return the `insert` construct supporting `on_conflict_do_update` for the dialect.
+
+    DuckDB accepts the Postgres syntax, so only SQLite needs its own construct.
+    """
+    if dialect.name == "sqlite":
+        return sqlite.insert
+    return postgresql.insert
+
+
+CHANGE_FEED_COLUMNS = (
+    "document_id",
+    "versao",
+    "tipo_documento",
+    "nome_pregao",
+    "inserted_at",
+    "last_update",
+)
+KEY_COLUMNS = ("document_id", "data_referencia", "data_entrega")
+
+
+def build_fnet_documento_upsert(
+    columns: Iterable[str],
+    dialect: Dialect,
+    returning: bool = True,
+):
+    """Build the upsert for `fnet_documento`, returning only the rows that were written.
+
+    Rows whose incoming values match the stored ones are left untouched, so the returned rows
+    are exactly the inserted and changed documents. `last_update` is NULL for inserted rows.
+    """
+    columns = [column for column in columns if column not in KEY_COLUMNS]
+    table = FnetDocumentoModel.__table__
+    statement = dialect_insert(dialect)(FnetDocumentoModel)
+    statement = statement.on_conflict_do_update(
+        index_elements=KEY_COLUMNS,
+        set_={
+            **{column: statement.excluded[column] for column in columns},
+            "last_update": func.now(),
+        },
+        where=or_(
+            *(table.c[column].is_distinct_from(statement.excluded[column]) for column in columns)
+        ),
+    )
+    if returning:
+        statement = statement.returning(*(table.c[column] for column in CHANGE_FEED_COLUMNS))
+    return statement
+
+
 def upsert_fnet_documento(session: Session, document: FnetDocumento) -> CursorResult:
     data = document.model_dump()
-    statement = (
-        insert(FnetDocumentoModel)
-        .values(**data)
-        .on_conflict_do_update(
-            constraint="uq_document_data_ref",
-            set_={**data, "last_update": func.now()},
-        )
+    connection = session.connection()
+    statement = build_fnet_documento_upsert(data, connection.dialect).values(**data)
+    return connection.execute(statement)
+
+
+def bulk_upsert_fnet_documentos(session: Session, batch: FnetDocumentoBatch) -> Sequence[Row]:
+    """Upsert a batch and return the inserted and changed rows.
+
+    The driver still receives one parameter dict per row, built from the columns by
+    `FnetDocumentoBatch.to_records`; only the pydantic model per document is avoided.
+
+    Backends that only return rows from single statements (DuckDB) get one multi-row VALUES
+    insert instead of an executemany, with one bind parameter per value of the page. The rows
+    are read right away, since SQLite can't commit while a RETURNING cursor is open. Without
+    RETURNING support the result is always empty.
+    """
+    if not len(batch):
+        return []
+
+    connection = session.connection()
+    dialect = connection.dialect
+    statement = build_fnet_documento_upsert(
+        batch.COLUMNS, dialect, returning=dialect.insert_returning
+    )
+    if not dialect.insert_returning:
+        connection.execute(statement, batch.to_records())
+        return []
+    if not dialect.insert_executemany_returning:
+        return connection.execute(statement.values(batch.to_records())).all()
+    return connection.execute(statement, batch.to_records()).all()
+
+
+def upsert_rendimento(
+    session: Session, document_id: int, dados: DadosEconomicoFinanceiros
+) -> CursorResult | None:
+    rendimento = dados.informe_rendimentos.rendimento
+    if rendimento is None:
+        return None
+
+    data = {
+        "document_id": document_id,
+        "cnpj_fundo": dados.dados_gerais.cnpj_fundo,
+        "nome_fundo": dados.dados_gerais.nome_fundo,
+        "cod_negociacao_cota": dados.dados_gerais.cod_negociacao_cota,
+        **rendimento.model_dump(),
+        "data_base": rendimento.data_base.date(),
+        "data_pagamento": rendimento.data_pagamento.date(),
+    }
+    connection = session.connection()
+    statement = dialect_insert(connection.dialect)(RendimentoModel).values(**data)
+    statement = statement.on_conflict_do_update(
+        index_elements=["document_id"],
+        set_={**data, "last_update": func.now()},
     )
-    return session.execute(statement)
+    return connection.execute(statement)
 
 
 def fetch_last_document_date(session: Session) -> datetime | None:
@@ -0,0 +1,261 @@
+import argparse
+from datetime import date
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from src.database.models import Base, FnetDocumentoModel
+from src.logger import configure_logger
+
+PARENT_TABLE = FnetDocumentoModel.__tablename__
+LEGACY_TABLE = f"{PARENT_TABLE}_legacy"
+HISTORICAL_PARTITION = f"{PARENT_TABLE}_historico"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+FIRST_PARTITION_YEAR = 2016
+DEFAULT_YEARS_AHEAD = 1
+
+logger = configure_logger("fnet_documento_partitions")
+
+
+def partition_name(year: int) -> str:
+    """Return the name of the partition holding documents delivered in `year`.
+
+    Example:
+    >>> partition_name(2023)
+    'fnet_documento_y2023'
+    """
+    return f"{PARENT_TABLE}_y{year}"
+
+
+def partition_bounds(year: int) -> tuple[date, date]:
+    """Return the inclusive lower and exclusive upper `data_entrega` bounds for `year`.
+
+    Example:
+    >>> partition_bounds(2023)
+    (datetime.date(2023, 1, 1), datetime.date(2024, 1, 1))
+    """
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def is_postgres(connection: Connection) -> bool:
+    return connection.dialect.name == "postgresql"
+
+
+def is_partitioned(connection: Connection, table_name: str = PARENT_TABLE) -> bool:
+    """Check whether `table_name` exists as a declaratively partitioned table."""
+    query = text(
+        """
+        SELECT 1
+        FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = :table_name
+        """
+    )
+    return connection.execute(query, {"table_name": table_name}).first() is not None
+
+
+def fetch_partitions(connection: Connection) -> set[str]:
+    """Return the names of the partitions currently attached to the parent table."""
+    query = text(
+        """
+        SELECT child.relname
+        FROM pg_inherits i
+        JOIN pg_class child ON child.oid = i.inhrelid
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        WHERE parent.relname = :parent
+        """
+    )
+    return set(connection.execute(query, {"parent": PARENT_TABLE}).scalars())
+
+
+def fetch_existing_tables(connection: Connection, names: list[str]) -> set[str]:
+    """Return which of `names` exist as tables, attached as a partition or not."""
+    query = text(
+        "SELECT relname FROM pg_class WHERE relname = ANY(:names) AND relkind IN ('r', 'p')"
+    )
+    return set(connection.execute(query, {"names": names}).scalars())
+
+
+def create_historical_partition(connection: Connection, first_year: int = FIRST_PARTITION_YEAR):
+    """Create the catch-all partition for documents delivered before `first_year`."""
+    lower, _ = partition_bounds(first_year)
+    connection.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {HISTORICAL_PARTITION} PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM (MINVALUE) TO ('{lower.isoformat()}')"
+        )
+    )
+
+
+def create_default_partition(connection: Connection):
+    """Create the partition catching documents no year partition covers yet.
+
+    Without it, a single document delivered after the last year partition would make the whole
+    batch insert fail.
+    """
+    connection.execute(
+        text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT")
+    )
+
+
+def create_year_partition(connection: Connection, year: int):
+    """Create the partition for `year`, moving the rows of that year out of the default one.
+
+    Postgres refuses to attach a partition while the default partition holds rows in its
+    range, so the partition is created as a plain table, filled with those rows and attached.
+    Indexes declared on the parent table (the BRIN indexes and the primary key) are created on
+    the new partition by Postgres itself.
+    """
+    lower, upper = partition_bounds(year)
+    name = partition_name(year)
+    connection.execute(
+        text(f"CREATE TABLE IF NOT EXISTS {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)")
+    )
+    connection.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            "WHERE data_entrega >= :lower AND data_entrega < :upper RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        {"lower": lower, "upper": upper},
+    )
+    connection.execute(
+        text(
+            f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+    )
+
+
+def ensure_partitions(
+    engine: Engine,
+    years_ahead: int = DEFAULT_YEARS_AHEAD,
+    first_year: int = FIRST_PARTITION_YEAR,
+) -> list[str]:
+    """Create the schema and every partition up to `years_ahead` years after the current one.
+
+    Safe to call before every run: existing tables and partitions are left untouched, and a
+    partition detached with `detach_partition` stays detached as long as its table exists. Rows
+    delivered after the last year partition land in the default partition until their year
+    gets its own. On backends other than Postgres only the plain tables are created.
+
+    Args:
+        engine (Engine): The SQLAlchemy engine to use.
+        years_ahead (int): How many future years should already have a partition.
+        first_year (int): First year with a dedicated partition; older rows go to the
+            historical partition.
+
+    Returns:
+        list[str]: Names of the partitions created by this call.
+    """
+    with engine.begin() as connection:
+        Base.metadata.create_all(connection)
+
+        if not is_postgres(connection):
+            return []
+
+        if not is_partitioned(connection):
+            raise RuntimeError(
+                f"Table {PARENT_TABLE} is not partitioned. Run `python -m src.database.partitions"
+                " --convert` to migrate it."
+            )
+
+        years = range(first_year, date.today().year + years_ahead + 1)
+        names = [HISTORICAL_PARTITION, DEFAULT_PARTITION, *map(partition_name, years)]
+        existing = fetch_existing_tables(connection, names)
+        detached = existing - fetch_partitions(connection)
+        created = []
+
+        if HISTORICAL_PARTITION not in existing:
+            create_historical_partition(connection, first_year)
+            created.append(HISTORICAL_PARTITION)
+
+        if DEFAULT_PARTITION not in existing:
+            create_default_partition(connection)
+            created.append(DEFAULT_PARTITION)
+
+        for year in years:
+            if partition_name(year) not in existing:
+                create_year_partition(connection, year)
+                created.append(partition_name(year))
+
+    if created:
+        logger.info(f"Created partitions: {', '.join(created)}")
+    if detached:
+        logger.info(f"Leaving detached partitions alone: {', '.join(sorted(detached))}")
+
+    return created
+
+
+def convert_legacy_table(engine: Engine, years_ahead: int = DEFAULT_YEARS_AHEAD):
+    """Migrate an existing non-partitioned `fnet_documento` into the partitioned layout.
+
+    The old table is renamed to `fnet_documento_legacy` and its rows are copied into the new
+    partitions. The legacy table is kept so it can be checked and dropped manually.
+    """
+    with engine.begin() as connection:
+        if not inspect(connection).has_table(PARENT_TABLE) or is_partitioned(connection):
+            logger.info(f"Nothing to convert: {PARENT_TABLE} is missing or already partitioned.")
+            return
+
+        connection.execute(text(f"ALTER TABLE {PARENT_TABLE} RENAME TO {LEGACY_TABLE}"))
+        for constraint in ("uq_document_data_ref", f"{PARENT_TABLE}_pkey"):
+            connection.execute(
+                text(
+                    f"ALTER TABLE {LEGACY_TABLE} "
+                    f"RENAME CONSTRAINT {constraint} TO {constraint}_legacy"
+                )
+            )
+
+    ensure_partitions(engine, years_ahead=years_ahead)
+
+    columns = ", ".join(column.name for column in FnetDocumentoModel.__table__.columns)
+    with engine.begin() as connection:
+        result = connection.execute(
+            text(
+                f"INSERT INTO {PARENT_TABLE} ({columns}) "
+                f"SELECT {columns} FROM {LEGACY_TABLE} ON CONFLICT DO NOTHING"
+            )
+        )
+    logger.info(f"Copied {result.rowcount} rows from {LEGACY_TABLE} into {PARENT_TABLE}.")
+
+
+def detach_partition(engine: Engine, year: int):
+    """Detach the partition for `year` so it can be archived or dropped independently."""
+    with engine.begin() as connection:
+        connection.execute(
+            text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {partition_name(year)}")
+        )
+
+
+def freeze_partition(engine: Engine, year: int):
+    """Freeze the tuples of a closed year so later vacuums can skip the partition."""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(f"VACUUM (FREEZE, ANALYZE) {partition_name(year)}"))
+
+
+if __name__ == "__main__":
+    from src.database.utils import get_db_engine
+
+    parser = argparse.ArgumentParser(description="Manage fnet_documento partitions.")
+    parser.add_argument("--years-ahead", type=int, default=DEFAULT_YEARS_AHEAD)
+    parser.add_argument(
+        "--convert",
+        action="store_true",
+        help="Migrate an existing non-partitioned table before creating partitions.",
+    )
+    parser.add_argument("--freeze", type=int, metavar="YEAR", help="Freeze a closed year.")
+    parser.add_argument("--detach", type=int, metavar="YEAR", help="Detach a year partition.")
+    args = parser.parse_args()
+
+    engine = get_db_engine()
+
+    if args.convert:
+        convert_legacy_table(engine, years_ahead=args.years_ahead)
+
+    ensure_partitions(engine, years_ahead=args.years_ahead)
+
+    if args.freeze:
+        freeze_partition(engine, args.freeze)
+    if args.detach:
+        detach_partition(engine, args.detach)
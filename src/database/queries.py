@@ -0,0 +1,167 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from pydantic import BaseModel, ConfigDict, validate_call
+from sqlalchemy import or_, select, tuple_
+from sqlalchemy.orm import Session
+
+from src.database.cache import QueryCache, cached_query
+from src.database.models import FnetDocumentoModel, RendimentoModel
+from src.validators import FnetDocumento
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+DocumentCursor = tuple[datetime, int]
+RendimentoCursor = tuple[date, int]
+
+query_cache = QueryCache()
+
+# Parses the arguments before the cache key is built, so a cursor that went through JSON, e.g.
+# `["2023-01-01T00:03:00", -4]`, hits the same entry as the tuple it came from.
+validate_query = validate_call(config=ConfigDict(arbitrary_types_allowed=True))
+
+
+class FrozenFnetDocumento(FnetDocumento):
+    model_config = ConfigDict(frozen=True)
+
+
+# Pages are shared by every caller hitting the same cache entry, so none of it is mutable.
+class DocumentPage(BaseModel):
+    items: tuple[FrozenFnetDocumento, ...]
+    next_cursor: DocumentCursor | None = None
+
+    model_config = ConfigDict(frozen=True)
+
+
+class FundRendimento(BaseModel):
+    document_id: int
+    cnpj_fundo: str
+    nome_fundo: str
+    cod_negociacao_cota: str
+    data_base: date
+    data_pagamento: date
+    valor_provento_cota: Decimal
+    periodo_referencia: str
+    ano: str
+    rendimento_isento_ir: bool
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
+class RendimentoPage(BaseModel):
+    items: tuple[FundRendimento, ...]
+    next_cursor: RendimentoCursor | None = None
+
+    model_config = ConfigDict(frozen=True)
+
+
+def clamp_limit(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+@validate_query
+@cached_query(query_cache)
+def fetch_documents(
+    session: Session,
+    ticker: str | None = None,
+    tipo_documento: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    cursor: DocumentCursor | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> DocumentPage:
+    """
+    Fetch documents newest first, paginated by `(data_entrega, document_id)`.
+
+    Args:
+        session (Session): The database session.
+        ticker (str, optional): Trading code listed in `informacoes_adicionais`, e.g. XPML11.
+            Only whole `;`-delimited codes match.
+        tipo_documento (str, optional): Only documents of this type.
+        start (datetime, optional): Only documents delivered at or after this moment.
+        end (datetime, optional): Only documents delivered before this moment.
+        cursor (DocumentCursor, optional): `next_cursor` of the previous page.
+        limit (int): Page size, capped at MAX_PAGE_SIZE.
+
+    Returns:
+        DocumentPage: The documents and the cursor of the next page, None on the last page.
+
+    Example:
+        >>> page = fetch_documents(session, ticker="XPML11")
+        >>> next_page = fetch_documents(session, ticker="XPML11", cursor=page.next_cursor)
+    """
+    limit = clamp_limit(limit)
+    table = FnetDocumentoModel.__table__
+
+    query = select(table).order_by(table.c.data_entrega.desc(), table.c.document_id.desc())
+    if ticker:
+        code = f"{ticker.upper()};"
+        query = query.where(
+            or_(
+                table.c.informacoes_adicionais.startswith(code, autoescape=True),
+                table.c.informacoes_adicionais.contains(f";{code}", autoescape=True),
+            )
+        )
+    if tipo_documento:
+        query = query.where(table.c.tipo_documento == tipo_documento)
+    if start:
+        query = query.where(table.c.data_entrega >= start)
+    if end:
+        query = query.where(table.c.data_entrega < end)
+    if cursor:
+        query = query.where(tuple_(table.c.data_entrega, table.c.document_id) < tuple(cursor))
+
+    rows = session.execute(query.limit(limit + 1)).mappings().all()
+    items = tuple(FrozenFnetDocumento.model_validate(dict(row)) for row in rows[:limit])
+    next_cursor = (items[-1].data_entrega, items[-1].document_id) if len(rows) > limit else None
+
+    return DocumentPage(items=items, next_cursor=next_cursor)
+
+
+@validate_query
+@cached_query(query_cache)
+def fetch_rendimentos(
+    session: Session,
+    ticker: str | None = None,
+    cnpj_fundo: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    cursor: RendimentoCursor | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> RendimentoPage:
+    """
+    Fetch dividends in `data_base` order, paginated by `(data_base, document_id)`.
+
+    Args:
+        session (Session): The database session.
+        ticker (str, optional): Trading code of the fund shares, e.g. XPML11.
+        cnpj_fundo (str, optional): Only digits of the fund CNPJ.
+        start (date, optional): Only dividends with `data_base` on or after this date.
+        end (date, optional): Only dividends with `data_base` on or before this date.
+        cursor (RendimentoCursor, optional): `next_cursor` of the previous page.
+        limit (int): Page size, capped at MAX_PAGE_SIZE.
+
+    Returns:
+        RendimentoPage: The dividends and the cursor of the next page, None on the last page.
+    """
+    limit = clamp_limit(limit)
+    query = select(RendimentoModel).order_by(RendimentoModel.data_base, RendimentoModel.document_id)
+    if ticker:
+        query = query.where(RendimentoModel.cod_negociacao_cota == ticker.upper())
+    if cnpj_fundo:
+        query = query.where(RendimentoModel.cnpj_fundo == cnpj_fundo)
+    if start:
+        query = query.where(RendimentoModel.data_base >= start)
+    if end:
+        query = query.where(RendimentoModel.data_base <= end)
+    if cursor:
+        query = query.where(
+            tuple_(RendimentoModel.data_base, RendimentoModel.document_id) > tuple(cursor)
+        )
+
+    rows = session.scalars(query.limit(limit + 1)).all()
+    items = tuple(FundRendimento.model_validate(row) for row in rows[:limit])
+    next_cursor = (items[-1].data_base, items[-1].document_id) if len(rows) > limit else None
+
+    return RendimentoPage(items=items, next_cursor=next_cursor)
@@ -1,21 +1,25 @@
 from contextlib import contextmanager
 from typing import Generator
 
-from sqlalchemy import create_engine, exc
-from sqlalchemy.engine.url import URL
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import URL, make_url
 from sqlalchemy.orm import Session, sessionmaker
 
-from src.settings import settings
+from src.settings import Settings, get_settings
 
 
-def get_db_engine():
+def build_postgres_url(settings: Settings) -> URL:
     """
-    Cria e retorna uma engine do SQLAlchemy para conexão com o banco de dados.
+    Monta a URL de conexão com o Postgres a partir das configurações POSTGRES_*.
 
-    Returns:
-        Engine: O engine do SQLAlchemy para a conexão com o banco de dados.
+    Raises:
+        ValueError: Se alguma das configurações do Postgres não estiver definida.
     """
-    database_url = URL.create(
+    if not (settings.POSTGRES_USER and settings.POSTGRES_PASSWORD and settings.POSTGRES_DB):
+        raise ValueError("Defina DATABASE_URL ou as variáveis POSTGRES_* para conectar ao banco.")
+
+    return URL.create(
         drivername="postgresql+psycopg2",
         username=settings.POSTGRES_USER,
         password=settings.POSTGRES_PASSWORD.get_secret_value(),
@@ -23,7 +27,38 @@ def get_db_engine():
         port=settings.POSTGRES_PORT,
         database=settings.POSTGRES_DB,
     )
-    return create_engine(database_url, pool_size=10, max_overflow=20, pool_recycle=3600)
+
+
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def get_db_engine(database_url: str | URL | None = None) -> Engine:
+    """
+    Cria e retorna uma engine do SQLAlchemy para conexão com o banco de dados.
+
+    Args:
+        database_url (str | URL, optional): URL do banco. Se omitida, usa DATABASE_URL e, na
+                                            falta dela, as configurações POSTGRES_*. Aceita
+                                            Postgres, SQLite e DuckDB (requer duckdb_engine).
+
+    Returns:
+        Engine: O engine do SQLAlchemy para a conexão com o banco de dados.
+    """
+    settings = get_settings()
+    url = make_url(database_url or settings.DATABASE_URL or build_postgres_url(settings))
+
+    backend = url.get_backend_name()
+    if backend == "postgresql":
+        return create_engine(url, pool_size=10, max_overflow=20, pool_recycle=3600)
+
+    engine = create_engine(url)
+    if backend == "sqlite":
+        event.listen(engine, "connect", configure_sqlite_connection)
+    return engine
 
 
 SessionLocal = sessionmaker()
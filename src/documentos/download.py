@@ -0,0 +1,41 @@
+import argparse
+
+import requests
+
+from src.database.models import fetch_documents_ids
+from src.database.utils import create_db_connection, get_db_engine
+from src.documentos.scrap import USER_AGENT, download_document
+from src.logger import configure_logger
+from src.metrics import collect_metrics, metrics
+from src.profiling import profile_run
+
+logging = configure_logger(name="fnet_download")
+
+
+def run(args: argparse.Namespace):
+    """Entry point of `fiis download`: save every stored document not yet in `args.output`."""
+    args.output.mkdir(parents=True, exist_ok=True)
+    downloaded_ids = [int(path.stem) for path in args.output.glob("*.xml") if path.stem.isdigit()]
+
+    with (
+        collect_metrics(args),
+        profile_run(args),
+        requests.Session() as session,
+        create_db_connection(get_db_engine(args.database_url)) as db_session,
+    ):
+        session.headers.update({"User-Agent": USER_AGENT})
+
+        saved = 0
+        for (document_id,) in fetch_documents_ids(db_session, exclude_ids=downloaded_ids):
+            if args.limit and saved >= args.limit:
+                break
+
+            content = download_document(session, document_id)
+            if content is None:
+                continue
+
+            (args.output / f"{document_id}.xml").write_bytes(content)
+            metrics.increment("fiis_documents_downloaded_total")
+            saved += 1
+
+        logging.info(f"Downloaded {saved} documents into {args.output}.")
@@ -0,0 +1,41 @@
+import argparse
+import csv
+import sys
+
+from sqlalchemy import select
+
+from src.database.models import FnetDocumentoModel
+from src.database.utils import create_db_connection, get_db_engine
+from src.logger import configure_logger
+from src.metrics import collect_metrics, metrics
+
+EXPORT_BATCH_SIZE = 1000
+
+logging = configure_logger(name="fnet_export")
+
+
+def run(args: argparse.Namespace):
+    """Entry point of `fiis export`: stream `fnet_documento` rows to a CSV file or stdout."""
+    table = FnetDocumentoModel.__table__
+    query = select(table).order_by(table.c.data_entrega, table.c.document_id)
+    if args.since:
+        query = query.where(table.c.data_entrega >= args.since)
+
+    output = sys.stdout if str(args.output) == "-" else args.output.open("w", newline="")
+    with (
+        collect_metrics(args),
+        create_db_connection(get_db_engine(args.database_url)) as db_session,
+    ):
+        writer = csv.writer(output)
+        writer.writerow(table.columns.keys())
+
+        exported = 0
+        result = db_session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for rows in result.partitions():
+            writer.writerows(rows)
+            exported += len(rows)
+            metrics.increment("fiis_documents_exported_total", len(rows))
+
+    if output is not sys.stdout:
+        output.close()
+    logging.info(f"Exported {exported} documents.")
@@ -1,14 +1,20 @@
+import base64
+import binascii
 import math
 from datetime import date, datetime
 from typing import Generator, Optional
 
 import requests
 
-from src.settings import configure_logger
+from src.batch import FnetDocumentoBatch
+from src.metrics import SIZE_BUCKETS, metrics
+from src.logger import configure_logger
 from src.utils import parse_date_string
 from src.validators import APIResponse, FnetDocumento
 
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36"
 API_ENDPOINT = "https://fnet.bmfbovespa.com.br/fnet/publico/pesquisarGerenciadorDocumentosDados"
+DOWNLOAD_ENDPOINT = "https://fnet.bmfbovespa.com.br/fnet/publico/downloadDocumento"
 DEFAULT_PAGE_SIZE = 200
 FUND_TYPE = 1
 DOC_CATEGORY_ID = 14
@@ -67,17 +73,46 @@ def retrieve_api_data(
         dict | None: The API response data or None if there was an error.
     """
     try:
-        response = session.get(API_ENDPOINT, params=query_params)
-        response.raise_for_status()
-        return response.json()
+        with metrics.stage("http_request"):
+            response = session.get(API_ENDPOINT, params=query_params)
+            response.raise_for_status()
+        with metrics.stage("json_decode"):
+            return response.json()
     except requests.RequestException as e:
+        metrics.increment("fiis_http_request_errors_total")
         logger.error(f"Failed to fetch data from URL {API_ENDPOINT}. Error: {e}")
         return None
     except Exception as e:
+        metrics.increment("fiis_http_request_errors_total")
         logger.error(f"Unexpected error during API request: {e}")
         return None
 
 
+def download_document(session: requests.Session, document_id: int) -> bytes | None:
+    """Download the content of a document, decoding the base64 payload FNET returns for XMLs.
+
+    Args:
+        session (requests.Session): The session to use for the API request.
+        document_id (int): The FNET document id.
+
+    Returns:
+        bytes | None: The document content or None if there was an error.
+    """
+    try:
+        with metrics.stage("http_download"):
+            response = session.get(DOWNLOAD_ENDPOINT, params={"id": document_id})
+            response.raise_for_status()
+    except requests.RequestException as e:
+        metrics.increment("fiis_http_request_errors_total")
+        logger.error(f"Failed to download document {document_id}. Error: {e}")
+        return None
+
+    try:
+        return base64.b64decode(response.content, validate=True)
+    except binascii.Error:
+        return response.content
+
+
 def log_data_fetch_period(start_date: Optional[DateTimeStr], end_date: Optional[DateTimeStr]):
     """Log the date range for data fetching."""
     if start_date and end_date:
@@ -121,13 +156,13 @@ def calculate_total_pages(
         return 0
 
 
-def iterate_api_pages(
+def iterate_api_page_data(
     session: requests.Session,
     start_date: Optional[DateTimeStr] = None,
     end_date: Optional[DateTimeStr] = None,
     items_per_page: int = DEFAULT_PAGE_SIZE,
-) -> Generator[FnetDocumento, None, None]:
-    """Generator to iterate over API pages and yield documents."""
+) -> Generator[dict, None, None]:
+    """Generator to iterate over API pages and yield the raw response of each page."""
     log_data_fetch_period(start_date, end_date)
 
     current_page = 0
@@ -142,11 +177,42 @@ def iterate_api_pages(
         f"Fetching a total of {page_data['recordsTotal']} records across {total_pages} pages."
     )
 
+    while current_page < total_pages:
+        metrics.increment("fiis_pages_fetched_total")
+        yield page_data
+        current_page += 1
+        logger.info(f"Processing page {current_page} of {total_pages}")
+        page_data = fetch_page_data(session, start_date, end_date, current_page)
+
+
+def iterate_api_pages(
+    session: requests.Session,
+    start_date: Optional[DateTimeStr] = None,
+    end_date: Optional[DateTimeStr] = None,
+    items_per_page: int = DEFAULT_PAGE_SIZE,
+) -> Generator[FnetDocumento, None, None]:
+    """Generator to iterate over API pages and yield documents."""
+    try:
+        for page_data in iterate_api_page_data(session, start_date, end_date, items_per_page):
+            with metrics.stage("model_validate"):
+                documents = APIResponse.model_validate(page_data).documents
+            yield from documents
+    except Exception as e:
+        logger.error(f"Error iterating over API pages: {e}")
+
+
+def iterate_api_batches(
+    session: requests.Session,
+    start_date: Optional[DateTimeStr] = None,
+    end_date: Optional[DateTimeStr] = None,
+    items_per_page: int = DEFAULT_PAGE_SIZE,
+) -> Generator[FnetDocumentoBatch, None, None]:
+    """Generator to iterate over API pages and yield each page as a columnar batch."""
     try:
-        while current_page < total_pages:
-            yield from APIResponse.model_validate(page_data).documents
-            current_page += 1
-            logger.info(f"Processing page {current_page} of {total_pages}")
-            page_data = fetch_page_data(session, start_date, end_date, current_page)
+        for page_data in iterate_api_page_data(session, start_date, end_date, items_per_page):
+            with metrics.stage("batch_build"):
+                batch = FnetDocumentoBatch.from_api_records(page_data["data"])
+            metrics.observe("fiis_batch_size", len(batch), buckets=SIZE_BUCKETS)
+            yield batch
     except Exception as e:
         logger.error(f"Error iterating over API pages: {e}")
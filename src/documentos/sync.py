@@ -0,0 +1,79 @@
+import argparse
+from datetime import datetime
+
+import requests
+
+from src.database.changefeed import ChangeFeed, ChangeLog
+from src.database.models import bulk_upsert_fnet_documentos, fetch_last_document_date
+from src.database.partitions import ensure_partitions
+from src.database.queries import query_cache
+from src.database.utils import create_db_connection, get_db_engine
+from src.documentos.scrap import USER_AGENT, iterate_api_batches
+from src.logger import configure_logger
+from src.metrics import collect_metrics, metrics
+from src.profiling import profile_run
+
+COMMIT_THRESHOLD = 500
+
+logging = configure_logger(name="fnet_documentos")
+
+
+def fetch_and_store_documents(session, db_session, change_feed: ChangeFeed | None = None):
+    """Fetch documents from API and store them in the database."""
+    start_date = fetch_last_document_date(db_session)
+    end_date = datetime.today()
+
+    processed = uncommitted = 0
+    batches_generator = iterate_api_batches(session, start_date=start_date, end_date=end_date)
+    for batch in batches_generator:
+        with metrics.stage("db_upsert"):
+            rows = bulk_upsert_fnet_documentos(db_session, batch)
+        if change_feed:
+            with metrics.stage("change_feed"):
+                changes = change_feed.publish(db_session, rows)
+            metrics.increment("fiis_documents_changed_total", len(changes))
+        metrics.increment("fiis_documents_processed_total", len(batch))
+        processed += len(batch)
+        uncommitted += len(batch)
+
+        if uncommitted >= COMMIT_THRESHOLD:
+            logging.info(f"Committing after processing {processed} documents.")
+            with metrics.stage("db_commit"):
+                db_session.commit()
+            uncommitted = 0
+
+    logging.info("Final commit after processing all documents.")
+    with metrics.stage("db_commit"):
+        db_session.commit()
+
+
+def run(args: argparse.Namespace):
+    """Entry point of `fiis sync`."""
+    change_feed = ChangeFeed(
+        changelog=ChangeLog(args.changelog) if args.changelog else None,
+        notify=not args.no_notify,
+    )
+
+    engine = get_db_engine(args.database_url)
+    ensure_partitions(engine)
+    if args.changelog and not engine.dialect.insert_returning:
+        logging.warning(
+            f"{engine.dialect.name} can't return the upserted rows, so --changelog will only "
+            "receive the changes recovered at the start of the next sync."
+        )
+
+    with (
+        collect_metrics(args),
+        profile_run(args),
+        requests.Session() as session,
+        create_db_connection(engine) as db_session,
+    ):
+        session.headers.update({"User-Agent": USER_AGENT})
+        change_feed.attach(db_session)
+        query_cache.attach(db_session)
+
+        try:
+            change_feed.recover(db_session)
+            fetch_and_store_documents(session, db_session, change_feed)
+        except Exception as e:
+            logging.error(f"Error while processing documents: {e}")
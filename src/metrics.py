@@ -0,0 +1,276 @@
+import argparse
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Generator
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1, 10, 50, 100, 200, 500, 1000, 5000)
+
+STAGE_DURATION = "fiis_stage_duration_seconds"
+
+Labels = tuple[tuple[str, str], ...]
+MetricKey = tuple[str, Labels]
+
+
+def format_labels(labels: Labels) -> str:
+    """Render labels in the Prometheus text format.
+
+    Example:
+    >>> format_labels((("stage", "http_request"),))
+    '{stage="http_request"}'
+    """
+    if not labels:
+        return ""
+    rendered = ",".join(f'{key}="{value}"' for key, value in labels)
+    return f"{{{rendered}}}"
+
+
+class Histogram:
+    __slots__ = ("buckets", "bucket_counts", "count", "total")
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        if index < len(self.bucket_counts):
+            self.bucket_counts[index] += 1
+        self.count += 1
+        self.total += value
+
+    def cumulative_counts(self) -> list[int]:
+        counts, running = [], 0
+        for bucket_count in self.bucket_counts:
+            running += bucket_count
+            counts.append(running)
+        return counts
+
+
+class MetricsRegistry:
+    """In-process counters and histograms for the sync pipelines.
+
+    Disabled by default: while disabled, `increment`, `observe` and `stage` return right away
+    so the instrumentation left in the pipelines costs close to nothing.
+
+    Usage:
+        metrics.enable()
+        with metrics.stage("http_request"):
+            response = session.get(...)
+        metrics.increment("fiis_documents_processed_total", len(batch))
+        metrics.write_prometheus("fiis.prom")
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.started_at = time.perf_counter()
+        self.counters: dict[MetricKey, float] = {}
+        self.histograms: dict[MetricKey, Histogram] = {}
+        self.stage_listeners: list[Any] = []
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+        self.started_at = time.perf_counter()
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+        self.started_at = time.perf_counter()
+
+    def increment(self, name: str, value: float = 1, labels: dict[str, str] | None = None):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())) if labels else ())
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        labels: dict[str, str] | None = None,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())) if labels else ())
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, labels: dict[str, str] | None = None) -> Generator[None, None, None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, labels)
+
+    def stage(self, name: str):
+        """Time a pipeline stage into `fiis_stage_duration_seconds{stage=name}`.
+
+        Stage listeners (see `add_stage_listener`) are notified even when metrics are disabled.
+        """
+        if not self.enabled and not self.stage_listeners:
+            return nullcontext()
+        return self._stage(name)
+
+    @contextmanager
+    def _stage(self, name: str) -> Generator[None, None, None]:
+        for listener in self.stage_listeners:
+            listener.enter_stage(name)
+        try:
+            with self.timer(STAGE_DURATION, {"stage": name}):
+                yield
+        finally:
+            for listener in reversed(self.stage_listeners):
+                listener.exit_stage(name)
+
+    def add_stage_listener(self, listener: Any):
+        """Register an object with `enter_stage(name)` and `exit_stage(name)` methods."""
+        self.stage_listeners.append(listener)
+
+    def remove_stage_listener(self, listener: Any):
+        self.stage_listeners.remove(listener)
+
+    def to_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items())
+
+            typed: set[str] = set()
+            for (name, labels), value in counters:
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{format_labels(labels)} {value:g}")
+
+            for (name, labels), histogram in histograms:
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                for bound, count in zip(histogram.buckets, histogram.cumulative_counts()):
+                    bucket_labels = labels + (("le", f"{bound:g}"),)
+                    lines.append(f"{name}_bucket{format_labels(bucket_labels)} {count}")
+                inf_labels = labels + (("le", "+Inf"),)
+                lines.append(f"{name}_bucket{format_labels(inf_labels)} {histogram.count}")
+                lines.append(f"{name}_sum{format_labels(labels)} {histogram.total:g}")
+                lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict[str, Any]:
+        """Summarise the run: counters with their per-second rates and stage timings."""
+        elapsed = time.perf_counter() - self.started_at
+        with self._lock:
+            counters = {
+                f"{name}{format_labels(labels)}": value
+                for (name, labels), value in sorted(self.counters.items())
+            }
+            histograms = {
+                f"{name}{format_labels(labels)}": {
+                    "count": histogram.count,
+                    "sum": round(histogram.total, 6),
+                    "mean": round(histogram.total / histogram.count, 6) if histogram.count else 0,
+                }
+                for (name, labels), histogram in sorted(self.histograms.items())
+            }
+
+        return {
+            "elapsed_seconds": round(elapsed, 3),
+            "counters": counters,
+            "rates_per_second": {
+                name: round(value / elapsed, 3) if elapsed else 0
+                for name, value in counters.items()
+            },
+            "histograms": histograms,
+        }
+
+    def write_prometheus(self, path: str | Path):
+        """Write the metrics atomically, as expected by the node_exporter textfile collector."""
+        write_atomically(Path(path), self.to_prometheus())
+
+    def write_summary(self, path: str | Path):
+        write_atomically(Path(path), json.dumps(self.summary(), indent=2, ensure_ascii=False))
+
+    def serve(self, port: int, host: str = "0.0.0.0") -> "ThreadingHTTPServer":
+        """Expose `/metrics` over HTTP from a daemon thread."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def write_atomically(path: Path, content: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = path.with_name(f".{path.name}.tmp")
+    temporary_path.write_text(content, encoding="utf-8")
+    os.replace(temporary_path, path)
+
+
+metrics = MetricsRegistry()
+
+
+def add_metrics_arguments(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("metrics")
+    group.add_argument("--metrics-file", type=Path, help="Write Prometheus metrics to this file.")
+    group.add_argument("--metrics-summary", type=Path, help="Write a JSON run summary here.")
+    group.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port.")
+
+
+@contextmanager
+def collect_metrics(args: argparse.Namespace) -> Generator[MetricsRegistry, None, None]:
+    """Enable metrics when any metrics option was given and export them when the run ends."""
+    if not (args.metrics_file or args.metrics_summary or args.metrics_port):
+        yield metrics
+        return
+
+    metrics.enable()
+    server = metrics.serve(args.metrics_port) if args.metrics_port else None
+    try:
+        yield metrics
+    finally:
+        if args.metrics_file:
+            metrics.write_prometheus(args.metrics_file)
+        if args.metrics_summary:
+            metrics.write_summary(args.metrics_summary)
+        if server:
+            server.shutdown()
+        metrics.disable()
@@ -0,0 +1,337 @@
+import argparse
+import cProfile
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Generator
+
+from src.metrics import metrics
+from src.logger import configure_logger
+
+DEFAULT_STAGE = "other"
+DEFAULT_SAMPLE_INTERVAL = 0.01
+TOP_FUNCTIONS = 15
+TRACEMALLOC_FRAMES = 10
+MEMORY_TOP_LINES = 100
+
+# Functions we already know to be hot, always reported in the run summary when they show up.
+WATCHED_FUNCTIONS = (
+    "parse_date_string",
+    "convert_xml_element_to_dict",
+    "model_validate",
+    "from_api_records",
+    "from_xml",
+)
+
+logger = configure_logger("fiis_profiling")
+
+FunctionKey = tuple[str, int, str]
+
+
+def format_function(key: FunctionKey) -> str:
+    """Render a pstats function key as `file:line(function)` with a shortened path.
+
+    Example:
+    >>> format_function(("/app/src/utils.py", 97, "parse_date_string"))
+    'src/utils.py:97(parse_date_string)'
+    """
+    filename, lineno, funcname = key
+    path = Path(filename)
+    if "src" in path.parts:
+        filename = "/".join(path.parts[path.parts.index("src") :])
+    elif path.name != filename:
+        filename = path.name
+    return f"{filename}:{lineno}({funcname})"
+
+
+def format_frame(frame) -> str:
+    code = frame.f_code
+    return f"{Path(code.co_filename).name}:{code.co_qualname}"
+
+
+def is_watched(name: str) -> bool:
+    return any(watched in name for watched in WATCHED_FUNCTIONS)
+
+
+def take_filtered_snapshot() -> tracemalloc.Snapshot:
+    """Snapshot the traced allocations, leaving out those of the profilers and the importer."""
+    return tracemalloc.take_snapshot().filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ]
+    )
+
+
+class StageProfiler:
+    """Deterministic profiler keeping one cProfile and allocation record per pipeline stage.
+
+    Registered as a stage listener on `src.metrics.metrics`, so every `metrics.stage(...)`
+    block is profiled separately. Code running outside any stage is attributed to `other`.
+
+    Output files, one per stage:
+        cpu_<stage>.pstats  Raw profile, loadable with `pstats` or snakeviz.
+        cpu_<stage>.tsv     Functions sorted by cumulative time.
+        memory_<stage>.tsv  Allocation sites grown between entering and leaving the first run of
+                            the stage, nested stages included. Snapshots are too slow to take
+                            on every run. For `other` the pair spans the whole profiled run.
+    """
+
+    def __init__(self, output_dir: Path, trace_memory: bool = True):
+        self.output_dir = output_dir
+        self.trace_memory = trace_memory
+        self.profiles: dict[str, cProfile.Profile] = {}
+        self.allocated_bytes: Counter[str] = Counter()
+        self.memory_diffs: dict[str, list[tracemalloc.StatisticDiff]] = {}
+        self._enter_snapshots: dict[str, tracemalloc.Snapshot] = {}
+        self._stack: list[tuple[str, int]] = []
+
+    def _profile(self, name: str) -> cProfile.Profile:
+        profile = self.profiles.get(name)
+        if profile is None:
+            profile = self.profiles[name] = cProfile.Profile()
+        return profile
+
+    def _traced_memory(self) -> int:
+        return tracemalloc.get_traced_memory()[0] if self.trace_memory else 0
+
+    def _snapshot_enter(self, name: str):
+        if self.trace_memory and name not in self.memory_diffs:
+            self._enter_snapshots.setdefault(name, take_filtered_snapshot())
+
+    def _snapshot_exit(self, name: str):
+        before = self._enter_snapshots.pop(name, None)
+        if before is not None:
+            after = take_filtered_snapshot()
+            stats = after.compare_to(before, "lineno")
+            changed = [stat for stat in stats if stat.size_diff or stat.count_diff]
+            self.memory_diffs[name] = changed[:MEMORY_TOP_LINES]
+
+    def start(self):
+        if self.trace_memory:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._snapshot_enter(DEFAULT_STAGE)
+        self._stack.append((DEFAULT_STAGE, self._traced_memory()))
+        self._profile(DEFAULT_STAGE).enable()
+
+    def enter_stage(self, name: str):
+        self.profiles[self._stack[-1][0]].disable()
+        self._snapshot_enter(name)
+        self._stack.append((name, self._traced_memory()))
+        self._profile(name).enable()
+
+    def exit_stage(self, name: str):
+        self.profiles[name].disable()
+        _, memory_at_enter = self._stack.pop()
+        if self.trace_memory:
+            self.allocated_bytes[name] += self._traced_memory() - memory_at_enter
+            self._snapshot_exit(name)
+        self.profiles[self._stack[-1][0]].enable()
+
+    def stop(self) -> dict[str, Any]:
+        self.profiles[DEFAULT_STAGE].disable()
+        if self.trace_memory:
+            self._snapshot_exit(DEFAULT_STAGE)
+            tracemalloc.stop()
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        for name, profile in self.profiles.items():
+            profile.create_stats()
+            self._write_cpu_profile(name, profile)
+        for name, stats in self.memory_diffs.items():
+            self._write_memory_diff(name, stats)
+
+        return self.summary()
+
+    def _write_cpu_profile(self, name: str, profile: cProfile.Profile):
+        profile.dump_stats(self.output_dir / f"cpu_{name}.pstats")
+
+        rows = sorted(
+            profile.stats.items(),  # type: ignore[attr-defined]
+            key=lambda item: (-item[1][3], format_function(item[0])),
+        )
+        lines = ["function\tncalls\ttottime\tcumtime"]
+        for key, (_, ncalls, tottime, cumtime, _) in rows:
+            lines.append(f"{format_function(key)}\t{ncalls}\t{tottime:.6f}\t{cumtime:.6f}")
+        (self.output_dir / f"cpu_{name}.tsv").write_text("\n".join(lines) + "\n")
+
+    def _write_memory_diff(self, name: str, stats: list[tracemalloc.StatisticDiff]):
+        lines = ["location\tsize_diff\tsize\tcount_diff"]
+        for stat in stats:
+            frame = stat.traceback[0]
+            location = format_function((frame.filename, frame.lineno, ""))[:-2]
+            lines.append(f"{location}\t{stat.size_diff}\t{stat.size}\t{stat.count_diff}")
+        (self.output_dir / f"memory_{name}.tsv").write_text("\n".join(lines) + "\n")
+
+    def summary(self) -> dict[str, Any]:
+        combined: dict[FunctionKey, list] = {}
+        for profile in self.profiles.values():
+            for key, (_, ncalls, tottime, cumtime, _) in profile.stats.items():  # type: ignore
+                totals = combined.setdefault(key, [0, 0.0, 0.0])
+                totals[0] += ncalls
+                totals[1] += tottime
+                totals[2] += cumtime
+        rows = sorted(combined.items(), key=lambda item: -item[1][1])
+
+        def describe(key: FunctionKey, totals: list) -> dict[str, Any]:
+            ncalls, tottime, cumtime = totals
+            return {
+                "function": format_function(key),
+                "ncalls": ncalls,
+                "tottime": round(tottime, 6),
+                "cumtime": round(cumtime, 6),
+            }
+
+        return {
+            "mode": "cpu",
+            "stages": {
+                name: {
+                    "total_time": round(
+                        sum(values[2] for values in profile.stats.values()), 6  # type: ignore
+                    ),
+                    "allocated_bytes": self.allocated_bytes.get(name, 0),
+                }
+                for name, profile in self.profiles.items()
+            },
+            "top_functions": [describe(key, totals) for key, totals in rows[:TOP_FUNCTIONS]],
+            "watched_functions": [
+                describe(key, totals) for key, totals in rows if is_watched(key[2])
+            ],
+        }
+
+
+class SamplingProfiler:
+    """Statistical profiler sampling the main thread stack at a fixed interval.
+
+    Much cheaper than `StageProfiler`, so it can stay on for production runs. Samples are
+    prefixed with the current stage and written as `samples.folded`, one sorted stack per line,
+    the input format of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, output_dir: Path, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stages: list[str] = [DEFAULT_STAGE]
+        self._thread_id = threading.get_ident()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def enter_stage(self, name: str):
+        self._stages.append(name)
+
+    def exit_stage(self, name: str):
+        self._stages.pop()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            frames = []
+            while frame is not None:
+                frames.append(format_frame(frame))
+                frame = frame.f_back
+            frames.append(self._stages[-1])
+            self.samples[";".join(reversed(frames))] += 1
+
+    def start(self):
+        self._thread_id = threading.get_ident()
+        self._thread.start()
+
+    def stop(self) -> dict[str, Any]:
+        self._stopped.set()
+        self._thread.join()
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        lines = [f"{stack} {count}" for stack, count in sorted(self.samples.items())]
+        (self.output_dir / "samples.folded").write_text("\n".join(lines) + "\n")
+
+        return self.summary()
+
+    def summary(self) -> dict[str, Any]:
+        own_samples: Counter[str] = Counter()
+        total_samples: Counter[str] = Counter()
+        stage_samples: Counter[str] = Counter()
+        for stack, count in self.samples.items():
+            stage, *frames = stack.split(";")
+            stage_samples[stage] += count
+            if frames:
+                own_samples[frames[-1]] += count
+            for frame in set(frames):
+                total_samples[frame] += count
+
+        total = sum(self.samples.values()) or 1
+
+        def describe(name: str) -> dict[str, Any]:
+            return {
+                "function": name,
+                "own_percent": round(100 * own_samples[name] / total, 2),
+                "total_percent": round(100 * total_samples[name] / total, 2),
+            }
+
+        return {
+            "mode": "sample",
+            "interval": self.interval,
+            "samples": sum(self.samples.values()),
+            "stages": dict(stage_samples.most_common()),
+            "top_functions": [describe(name) for name, _ in own_samples.most_common(TOP_FUNCTIONS)],
+            "watched_functions": [describe(name) for name in total_samples if is_watched(name)],
+        }
+
+
+def log_summary(summary: dict[str, Any]):
+    logger.info(f"Top functions ({summary['mode']} profile):")
+    for row in summary["top_functions"]:
+        logger.info("  " + "  ".join(f"{key}={value}" for key, value in row.items()))
+    for row in summary["watched_functions"]:
+        logger.info("  [watched] " + "  ".join(f"{key}={value}" for key, value in row.items()))
+
+
+def add_profiling_arguments(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("profiling")
+    group.add_argument("--profile", type=Path, metavar="DIR", help="Write profiles to DIR.")
+    group.add_argument(
+        "--profile-mode",
+        choices=("cpu", "sample"),
+        default="cpu",
+        help="cpu: cProfile and tracemalloc per stage. sample: low overhead stack sampling.",
+    )
+    group.add_argument(
+        "--profile-interval",
+        type=float,
+        default=DEFAULT_SAMPLE_INTERVAL,
+        help="Seconds between samples in sample mode.",
+    )
+
+
+@contextmanager
+def profile_run(args: argparse.Namespace) -> Generator[None, None, None]:
+    """Profile the wrapped block when `--profile` was given, then write and log the summary."""
+    if not args.profile:
+        yield
+        return
+
+    if args.profile_mode == "sample":
+        profiler: StageProfiler | SamplingProfiler = SamplingProfiler(
+            args.profile, args.profile_interval
+        )
+    else:
+        profiler = StageProfiler(args.profile)
+
+    metrics.add_stage_listener(profiler)
+    started_at = time.perf_counter()
+    profiler.start()
+    try:
+        yield
+    finally:
+        summary = profiler.stop()
+        metrics.remove_stage_listener(profiler)
+        summary["elapsed_seconds"] = round(time.perf_counter() - started_at, 3)
+        (args.profile / "summary.json").write_text(json.dumps(summary, indent=2) + "\n")
+        log_summary(summary)
+        logger.info(f"Profiles written to {args.profile}")
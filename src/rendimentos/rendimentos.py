@@ -1,11 +1,22 @@
+import argparse
 import xml.etree.cElementTree as et
 from pathlib import Path
+from typing import Generator
 
 import pandas as pd
+from sqlalchemy.orm import Session
 
-from src.models import (
-    DadosEconomicoFinanceiros,
-)
+from src.database.changefeed import notify_rendimentos
+from src.database.models import upsert_rendimento
+from src.database.partitions import ensure_partitions, is_postgres
+from src.database.queries import query_cache
+from src.database.utils import create_db_connection, get_db_engine
+from src.logger import configure_logger
+from src.metrics import collect_metrics, metrics
+from src.profiling import profile_run
+from src.validators import DadosEconomicoFinanceiros
+
+logging = configure_logger(name="fii_rendimentos")
 
 
 def format_dados_gerais(df: pd.DataFrame) -> pd.DataFrame:
@@ -31,13 +42,22 @@ def format_dados_gerais(df: pd.DataFrame) -> pd.DataFrame:
     return deduplicated_df
 
 
-if __name__ == "__main__":
-    vals = []
-    for path in Path("rendimentos").iterdir():
-        tree = et.parse(path)
-        root = tree.getroot()
-        dados = DadosEconomicoFinanceiros.from_xml(root)
+def parse_rendimentos_dir(
+    path: Path,
+) -> Generator[tuple[Path, DadosEconomicoFinanceiros], None, None]:
+    """Parse every XML report in `path`, yielding each file with its `DadosEconomicoFinanceiros`."""
+    for xml_path in path.iterdir():
+        with metrics.stage("xml_parse"):
+            root = et.parse(xml_path).getroot()
+        with metrics.stage("xml_validate"):
+            dados = DadosEconomicoFinanceiros.from_xml(root)
+        metrics.increment("fiis_rendimentos_files_total")
+        yield xml_path, dados
 
+
+def build_dados_gerais_records(dados_iter) -> list[dict]:
+    vals = []
+    for _, dados in dados_iter:
         if not dados.informe_rendimentos.rendimento:
             continue
 
@@ -47,9 +67,55 @@ if __name__ == "__main__":
                 **{"data_base": dados.informe_rendimentos.rendimento.data_base},
             }
         )
+    return vals
+
+
+def store_rendimentos(session: Session, parsed: list[tuple[Path, DadosEconomicoFinanceiros]]):
+    """Upsert the dividends of reports saved as `<document_id>.xml` by `fiis download`.
+
+    On Postgres each stored dividend is also announced via NOTIFY, so the query caches of
+    other processes drop their `fii_rendimento` pages on commit.
+    """
+    stored = []
+    for xml_path, dados in parsed:
+        if not xml_path.stem.isdigit():
+            continue
+        with metrics.stage("db_upsert"):
+            if upsert_rendimento(session, int(xml_path.stem), dados) is not None:
+                stored.append(int(xml_path.stem))
 
-    df = pd.DataFrame.from_records(vals)
-    df = format_dados_gerais(df)
-    print(df["cnpj_fundo"].value_counts())
-    print(df.info())
-    print(df[df["cnpj_fundo"] == "18085673000157"].head())
+    if is_postgres(session.connection()):
+        notify_rendimentos(session, stored)
+    with metrics.stage("db_commit"):
+        session.commit()
+    logging.info(f"Stored {len(stored)} rendimentos.")
+
+
+def run(args: argparse.Namespace):
+    """Entry point of `fiis rendimentos`."""
+    with collect_metrics(args), profile_run(args):
+        parsed = list(parse_rendimentos_dir(args.path))
+
+        if args.store:
+            engine = get_db_engine(args.database_url)
+            ensure_partitions(engine)
+            with create_db_connection(engine) as db_session:
+                query_cache.attach(db_session)
+                store_rendimentos(db_session, parsed)
+
+        vals = build_dados_gerais_records(parsed)
+        if not vals:
+            logging.info(f"No rendimentos found in {args.path}.")
+            return
+
+        with metrics.stage("dataframe_format"):
+            df = pd.DataFrame.from_records(vals)
+            df = format_dados_gerais(df)
+
+    logging.info(
+        f"Summarised {len(df)} trading codes of {df['cnpj_fundo'].nunique()} funds, "
+        f"{df['ativo'].sum()} of them active."
+    )
+    if args.output:
+        df.to_csv(args.output, index=False)
+        logging.info(f"Fund summary written to {args.output}")
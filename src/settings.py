@@ -1,16 +1,18 @@
-import logging
-import sys
+from functools import lru_cache
 
 from pydantic import SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
-    POSTGRES_USER: str
-    POSTGRES_PASSWORD: SecretStr
-    POSTGRES_DB: str
-    POSTGRES_HOST: str
-    POSTGRES_PORT: int
+    # Any SQLAlchemy URL, e.g. `sqlite:///fiis.db` or `duckdb:///fiis.duckdb`. When unset, the
+    # Postgres settings below are used.
+    DATABASE_URL: str | None = None
+    POSTGRES_USER: str | None = None
+    POSTGRES_PASSWORD: SecretStr | None = None
+    POSTGRES_DB: str | None = None
+    POSTGRES_HOST: str | None = None
+    POSTGRES_PORT: int | None = None
 
     model_config = SettingsConfigDict(
         env_file=".env.dev",
@@ -19,37 +21,7 @@ class Settings(BaseSettings):
     )
 
 
-settings = Settings()  # type: ignore
-
-
-def configure_logger(name="example", log_level=logging.INFO):
-    """
-    Configures and returns a logger.
-
-    Args:
-        name (str): Name of the logger.
-        log_level (int): Minimum logging level to capture.
-
-    Returns:
-        logging.Logger: Configured logger.
-    """
-    logger = logging.getLogger(name)
-
-    # Avoid log messages being processed by ancestor loggers' handlers
-    logger.propagate = False
-
-    # Set the logger's level
-    logger.setLevel(log_level)
-
-    formatter = logging.Formatter(
-        fmt="%(asctime)s - %(levelname)s - [%(name)s:%(filename)s:%(funcName)s] - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-
-    stdout = logging.StreamHandler(stream=sys.stdout)
-    stdout.setFormatter(formatter)
-    stdout.setLevel(log_level)
-
-    logger.addHandler(stdout)
-
-    return logger
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """Load the settings on first use instead of at import time."""
+    return Settings()  # type: ignore
@@ -116,6 +116,8 @@ def parse_date_string(date_string: str | date) -> datetime | date:
     """
     if isinstance(date_string, (date, datetime)):
         return date_string
+    if not isinstance(date_string, str):
+        raise ValueError(f"Expected a date string, got {date_string!r}")
 
     possible_formats = [
         "%Y-%m-%d",
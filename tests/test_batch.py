@@ -0,0 +1,94 @@
+from datetime import date, datetime
+
+import pytest
+from pydantic import ValidationError
+
+from src.batch import FnetDocumentoBatch
+from src.validators import FnetDocumento
+
+
+def make_api_record(document_id: int, **overrides) -> dict:
+    record = {
+        "id": document_id,
+        "descricaoFundo": "FII EXEMPLO",
+        "categoriaDocumento": "Informes Periódicos",
+        "tipoDocumento": "Rendimentos e Amortizações",
+        "dataReferencia": "12/10/2023",
+        "dataEntrega": "12/10/2023 14:30",
+        "status": "AC",
+        "descricaoStatus": "Ativo com visualização",
+        "analisado": "N",
+        "situacaoDocumento": "A",
+        "altaPrioridade": False,
+        "formatoDataReferencia": "3",
+        "versao": 1,
+        "modalidade": "AP",
+        "descricaoModalidade": "Apresentação",
+        "nomePregao": "FII EXEMPLO",
+        "informacoesAdicionais": "EXEM11;",
+        "idTemplate": 0,
+        "idSelectItemConvenio": 0,
+        "indicadorFundoAtivoB3": True,
+    }
+    return record | overrides
+
+
+def test_from_api_records_builds_typed_columns():
+    batch = FnetDocumentoBatch.from_api_records([make_api_record(1), make_api_record(2)])
+
+    assert len(batch) == 2
+    assert batch.columns["document_id"] == [1, 2]
+    assert batch.columns["data_referencia"] == [date(2023, 10, 12)] * 2
+    assert batch.columns["data_entrega"] == [datetime(2023, 10, 12, 14, 30)] * 2
+
+
+def test_from_api_records_keeps_last_repeated_id():
+    batch = FnetDocumentoBatch.from_api_records([make_api_record(1), make_api_record(1, versao=2)])
+
+    assert len(batch) == 1
+    assert batch.columns["versao"] == [2]
+
+
+def test_from_api_records_rejects_invalid_values():
+    with pytest.raises(TypeError):
+        FnetDocumentoBatch.from_api_records([make_api_record(1, status=None)])
+
+    with pytest.raises(ValueError):
+        FnetDocumentoBatch.from_api_records([make_api_record(1, dataEntrega="2023.10.12")])
+
+
+def test_batch_matches_pydantic_model():
+    record = make_api_record(1)
+    batch = FnetDocumentoBatch.from_api_records([record])
+
+    assert batch[0] == FnetDocumento.model_validate(record)
+    assert list(batch) == [batch[0]]
+    assert FnetDocumentoBatch.from_documents(batch).columns == batch.columns
+    assert batch.to_records() == [batch[0].model_dump()]
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"altaPrioridade": None},
+        {"indicadorFundoAtivoB3": "talvez"},
+        {"versao": 1.5},
+        {"idTemplate": None},
+        {"dataReferencia": "12/10/2023 14:30"},
+        {"dataReferencia": None},
+        {"dataEntrega": None},
+    ],
+)
+def test_batch_rejects_what_pydantic_rejects(overrides):
+    record = make_api_record(1, **overrides)
+
+    with pytest.raises(ValidationError):
+        FnetDocumento.model_validate(record)
+    with pytest.raises(ValidationError):
+        FnetDocumentoBatch.from_api_records([record])
+
+
+def test_batch_coerces_like_pydantic():
+    record = make_api_record(1, versao="2", altaPrioridade="false", indicadorFundoAtivoB3=1)
+
+    assert FnetDocumentoBatch.from_api_records([record])[0] == FnetDocumento.model_validate(record)
@@ -0,0 +1,169 @@
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event, update
+from sqlalchemy.orm import Session
+
+from src.batch import FnetDocumentoBatch
+from src.database.benchmark import make_api_records
+from src.database.changefeed import (
+    ChangeFeed,
+    ChangeLog,
+    DocumentChange,
+    changes_from_result,
+    fetch_changes_since,
+    listen,
+)
+from src.database.models import FnetDocumentoModel, bulk_upsert_fnet_documentos
+from src.database.partitions import ensure_partitions
+
+Row = namedtuple("Row", "document_id versao tipo_documento nome_pregao inserted_at last_update")
+
+
+def make_change(document_id: int) -> DocumentChange:
+    return DocumentChange(
+        operation="insert",
+        document_id=document_id,
+        versao=1,
+        tipo_documento="Rendimentos e Amortizações",
+        nome_pregao="FII EXEMPLO",
+    )
+
+
+def test_changes_from_result():
+    rows = [
+        Row(1, 1, "Rendimentos e Amortizações", "FII A", datetime(2023, 10, 11), None),
+        Row(
+            2,
+            2,
+            "Rendimentos e Amortizações",
+            "FII B",
+            datetime(2023, 10, 11),
+            datetime(2023, 10, 12),
+        ),
+    ]
+
+    changes = changes_from_result(rows)  # type: ignore[arg-type]
+
+    assert [change.operation for change in changes] == ["insert", "update"]
+    assert [change.document_id for change in changes] == [1, 2]
+    assert [change.changed_at for change in changes] == [
+        datetime(2023, 10, 11),
+        datetime(2023, 10, 12),
+    ]
+    assert changes_from_result(None) == []
+
+
+def test_changelog_offsets_per_consumer(tmp_path):
+    changelog = ChangeLog(tmp_path / "changes.ndjson")
+    changelog.append([make_change(1), make_change(2)])
+
+    offset, first = next(changelog.read("a"))
+    changelog.commit("a", offset)
+    changelog.append([make_change(3)])
+
+    assert first.document_id == 1
+    assert [change.document_id for _, change in changelog.read("a")] == [2, 3]
+    assert [change.document_id for _, change in changelog.read("b")] == [1, 2, 3]
+
+
+def test_changefeed_only_logs_committed_changes(tmp_path):
+    changelog = ChangeLog(tmp_path / "changes.ndjson")
+    change_feed = ChangeFeed(changelog=changelog)
+
+    with Session(create_engine("sqlite://")) as session:
+        change_feed.attach(session)
+
+        session.connection()
+        change_feed.pending.append(make_change(1))
+        session.rollback()
+
+        session.connection()
+        change_feed.pending.append(make_change(2))
+        session.commit()
+
+    assert [change.document_id for _, change in changelog.read("a")] == [2]
+
+
+class FailingListenConnection:
+    def __init__(self):
+        self.calls: list[str] = []
+
+    def detach(self):
+        self.calls.append("detach")
+
+    def set_isolation_level(self, level: int):
+        self.calls.append(f"isolation_level {level}")
+
+    @contextmanager
+    def cursor(self):
+        raise ConnectionError("server closed the connection")
+        yield
+
+    def close(self):
+        self.calls.append("close")
+
+
+def test_listen_never_returns_its_connection_to_the_pool():
+    connection = FailingListenConnection()
+
+    class Engine:
+        def raw_connection(self):
+            return connection
+
+    with pytest.raises(ConnectionError):
+        next(listen(Engine()))  # type: ignore[arg-type]
+
+    assert connection.calls == ["detach", "isolation_level 0", "close"]
+
+
+def test_recover_appends_changes_missing_from_the_log(tmp_path):
+    engine = create_engine("sqlite://")
+    ensure_partitions(engine)
+    changelog = ChangeLog(tmp_path / "changes.ndjson")
+    change_feed = ChangeFeed(changelog=changelog)
+    table = FnetDocumentoModel.__table__
+
+    with Session(engine) as session:
+        assert change_feed.recover(session) == []
+
+        batch = FnetDocumentoBatch.from_api_records(make_api_records(3))
+        bulk_upsert_fnet_documentos(session, batch)
+        for document_id, inserted_at in [(-1, 12), (-2, 12), (-3, 13)]:
+            session.execute(
+                update(table)
+                .where(table.c.document_id == document_id)
+                .values(inserted_at=datetime(2023, 10, inserted_at), last_update=None)
+            )
+        session.commit()
+        changelog.append(
+            [make_change(-1).model_copy(update={"changed_at": datetime(2023, 10, 12)})]
+        )
+
+        recovered = change_feed.recover(session)
+
+    assert [change.document_id for change in recovered] == [-2, -3]
+    assert [change.document_id for _, change in changelog.read("a")] == [-1, -2, -3]
+    assert change_feed.recover(Session(engine)) == []
+
+
+def test_fetch_changes_since_uses_the_changed_at_index():
+    engine = create_engine("sqlite://")
+    ensure_partitions(engine)
+    statements = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, parameters, *args: statements.append(
+            (statement, parameters)
+        ),
+    )
+
+    with Session(engine) as session:
+        fetch_changes_since(session, datetime(2023, 10, 12))
+        statement, parameters = statements[-1]
+        plan = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+
+        assert "ix_fnet_documento_changed_at" in " ".join(row[-1] for row in plan)
@@ -0,0 +1,54 @@
+import subprocess
+import sys
+from datetime import date
+from pathlib import Path
+
+from src.cli import build_parser, load_handler
+
+HEAVY_MODULES = ("pandas", "pydantic", "pydantic_settings", "requests", "sqlalchemy")
+
+
+def test_parser_does_not_import_heavy_modules():
+    code = (
+        "import sys\n"
+        "from src.cli import build_parser\n"
+        "build_parser().format_help()\n"
+        f"print([name for name in {HEAVY_MODULES!r} if name in sys.modules])\n"
+    )
+    root = Path(__file__).parents[1]
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True
+    )
+    assert output.stdout.strip() == "[]"
+
+
+def test_subcommands_point_to_their_handlers():
+    parser = build_parser()
+
+    sync_args = parser.parse_args(["sync", "--no-notify"])
+    assert sync_args.handler == "src.documentos.sync:run"
+    assert sync_args.no_notify is True
+
+    export_args = parser.parse_args(["export", "--since", "2023-10-12"])
+    assert export_args.since == date(2023, 10, 12)
+    assert str(export_args.output) == "-"
+
+    rendimentos_args = parser.parse_args(["rendimentos", "--output", "fundos.csv"])
+    assert rendimentos_args.handler == "src.rendimentos.rendimentos:run"
+    assert rendimentos_args.output == Path("fundos.csv")
+
+
+def test_database_url_before_or_after_the_subcommand():
+    parser = build_parser()
+
+    assert parser.parse_args(["sync"]).database_url is None
+    assert parser.parse_args(["--database-url", "sqlite:///a.db", "sync"]).database_url == (
+        "sqlite:///a.db"
+    )
+    assert parser.parse_args(["sync", "--database-url", "sqlite:///b.db"]).database_url == (
+        "sqlite:///b.db"
+    )
+
+
+def test_load_handler():
+    assert load_handler("src.utils:clean_text")("FII: 11") == "FII11"
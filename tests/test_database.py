@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from src.batch import FnetDocumentoBatch
+from src.database.benchmark import make_api_records
+from src.database.changefeed import changes_from_result
+from src.database.models import bulk_upsert_fnet_documentos, fetch_last_document_date
+from src.database.partitions import ensure_partitions
+from src.database.utils import create_db_connection, get_db_engine
+
+
+def upsert_operations(db_session, version: int) -> list[str]:
+    batch = FnetDocumentoBatch.from_api_records(make_api_records(3, version))
+    rows = bulk_upsert_fnet_documentos(db_session, batch)
+    db_session.commit()
+    return [change.operation for change in changes_from_result(rows)]
+
+
+def test_bulk_upsert_on_sqlite(tmp_path):
+    engine = get_db_engine(f"sqlite:///{tmp_path / 'fiis.db'}")
+    ensure_partitions(engine)
+
+    with create_db_connection(engine) as db_session:
+        assert upsert_operations(db_session, version=1) == ["insert"] * 3
+        assert upsert_operations(db_session, version=1) == []
+        assert upsert_operations(db_session, version=2) == ["update"] * 3
+        assert fetch_last_document_date(db_session) == datetime(2023, 1, 1, 0, 2)
+
+
+def test_bulk_upsert_without_executemany_returning(tmp_path, monkeypatch):
+    engine = get_db_engine(f"sqlite:///{tmp_path / 'fiis.db'}")
+    ensure_partitions(engine)
+    monkeypatch.setattr(engine.dialect, "insert_executemany_returning", False)
+
+    with create_db_connection(engine) as db_session:
+        assert upsert_operations(db_session, version=1) == ["insert"] * 3
+        assert upsert_operations(db_session, version=2) == ["update"] * 3
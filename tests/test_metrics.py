@@ -0,0 +1,66 @@
+import json
+from contextlib import nullcontext
+
+from src.metrics import SIZE_BUCKETS, MetricsRegistry
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry()
+    registry.increment("fiis_documents_processed_total")
+    registry.observe("fiis_batch_size", 10)
+
+    assert isinstance(registry.stage("http_request"), nullcontext)
+    assert registry.counters == {}
+    assert registry.histograms == {}
+
+
+def test_prometheus_text_format():
+    registry = MetricsRegistry()
+    registry.enable()
+    registry.increment("fiis_documents_processed_total", 200)
+    registry.observe("fiis_batch_size", 200, buckets=SIZE_BUCKETS)
+    registry.observe("fiis_batch_size", 5, buckets=SIZE_BUCKETS)
+
+    text = registry.to_prometheus()
+
+    assert "# TYPE fiis_documents_processed_total counter" in text
+    assert "fiis_documents_processed_total 200" in text
+    assert 'fiis_batch_size_bucket{le="10"} 1' in text
+    assert 'fiis_batch_size_bucket{le="200"} 2' in text
+    assert 'fiis_batch_size_bucket{le="+Inf"} 2' in text
+    assert "fiis_batch_size_count 2" in text
+
+
+def test_stage_timer_and_summary(tmp_path):
+    registry = MetricsRegistry()
+    registry.enable()
+
+    with registry.stage("db_upsert"):
+        pass
+
+    summary_path = tmp_path / "summary.json"
+    registry.write_summary(summary_path)
+    summary = json.loads(summary_path.read_text())
+
+    stage = summary["histograms"]['fiis_stage_duration_seconds{stage="db_upsert"}']
+    assert stage["count"] == 1
+
+
+def test_stage_listeners_run_when_disabled():
+    calls = []
+
+    class Listener:
+        def enter_stage(self, name):
+            calls.append(("enter", name))
+
+        def exit_stage(self, name):
+            calls.append(("exit", name))
+
+    registry = MetricsRegistry()
+    registry.add_stage_listener(Listener())
+
+    with registry.stage("xml_parse"):
+        pass
+
+    assert calls == [("enter", "xml_parse"), ("exit", "xml_parse")]
+    assert registry.histograms == {}
@@ -0,0 +1,92 @@
+from contextlib import contextmanager
+from datetime import date
+
+from sqlalchemy import inspect
+
+from src.database import partitions
+from src.database.partitions import (
+    DEFAULT_PARTITION,
+    HISTORICAL_PARTITION,
+    ensure_partitions,
+    partition_bounds,
+    partition_name,
+)
+from src.database.utils import get_db_engine
+
+
+class RecordingConnection:
+    class dialect:
+        name = "postgresql"
+
+    def __init__(self):
+        self.statements: list[str] = []
+
+    def execute(self, statement, parameters=None):
+        self.statements.append(" ".join(str(statement).split()))
+
+
+class RecordingEngine:
+    def __init__(self):
+        self.connection = RecordingConnection()
+
+    @contextmanager
+    def begin(self):
+        yield self.connection
+
+
+def test_partition_name_and_bounds():
+    assert partition_name(2023) == "fnet_documento_y2023"
+    assert partition_bounds(2023) == (date(2023, 1, 1), date(2024, 1, 1))
+
+
+def test_ensure_partitions_on_sqlite(tmp_path):
+    engine = get_db_engine(f"sqlite:///{tmp_path / 'fiis.db'}")
+
+    assert ensure_partitions(engine) == []
+    assert inspect(engine).has_table("fnet_documento")
+
+
+def mock_postgres_catalog(monkeypatch, tables: set[str], attached: set[str]):
+    monkeypatch.setattr(partitions.Base.metadata, "create_all", lambda connection: None)
+    monkeypatch.setattr(partitions, "is_partitioned", lambda connection: True)
+    monkeypatch.setattr(partitions, "fetch_partitions", lambda connection: attached)
+    monkeypatch.setattr(
+        partitions, "fetch_existing_tables", lambda connection, names: tables & set(names)
+    )
+
+
+def test_ensure_partitions_on_postgres(monkeypatch):
+    engine = RecordingEngine()
+    existing = {HISTORICAL_PARTITION, partition_name(2016)}
+    mock_postgres_catalog(monkeypatch, tables=existing, attached=existing)
+
+    created = ensure_partitions(engine, years_ahead=1, first_year=2016)  # type: ignore[arg-type]
+
+    years = range(2017, date.today().year + 2)
+    assert created == [DEFAULT_PARTITION, *(partition_name(year) for year in years)]
+    assert engine.connection.statements[0] == (
+        f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF fnet_documento DEFAULT"
+    )
+    assert engine.connection.statements[1:4] == [
+        "CREATE TABLE IF NOT EXISTS fnet_documento_y2017 "
+        "(LIKE fnet_documento INCLUDING DEFAULTS)",
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE data_entrega >= :lower "
+        "AND data_entrega < :upper RETURNING *) INSERT INTO fnet_documento_y2017 "
+        "SELECT * FROM moved",
+        "ALTER TABLE fnet_documento ATTACH PARTITION fnet_documento_y2017 "
+        "FOR VALUES FROM ('2017-01-01') TO ('2018-01-01')",
+    ]
+
+
+def test_ensure_partitions_keeps_detached_partitions_detached(monkeypatch):
+    engine = RecordingEngine()
+    tables = {HISTORICAL_PARTITION, DEFAULT_PARTITION, partition_name(2016), partition_name(2017)}
+    mock_postgres_catalog(monkeypatch, tables=tables, attached=tables - {partition_name(2017)})
+
+    created = ensure_partitions(engine, years_ahead=1, first_year=2016)  # type: ignore[arg-type]
+
+    assert partition_name(2017) not in created
+    assert partition_name(2018) in created
+    assert not any(
+        "fnet_documento_y2017" in statement for statement in engine.connection.statements
+    )
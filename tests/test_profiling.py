@@ -0,0 +1,84 @@
+import json
+import sys
+from argparse import Namespace
+
+from src.metrics import metrics
+from src.profiling import SamplingProfiler, StageProfiler, format_function, profile_run
+from src.utils import parse_date_string
+
+
+def test_format_function():
+    assert (
+        format_function(("/app/src/utils.py", 97, "parse_date_string"))
+        == "src/utils.py:97(parse_date_string)"
+    )
+    assert format_function(("/usr/lib/python3.11/json/decoder.py", 1, "decode")) == (
+        "decoder.py:1(decode)"
+    )
+
+
+def test_stage_profiler_writes_one_profile_per_stage(tmp_path):
+    profiler = StageProfiler(tmp_path)
+    profiler.start()
+    profiler.enter_stage("parse")
+    parse_date_string("2023-10-12")
+    profiler.exit_stage("parse")
+    summary = profiler.stop()
+
+    assert (tmp_path / "cpu_parse.pstats").exists()
+    assert (tmp_path / "cpu_parse.tsv").read_text().startswith("function\tncalls")
+    assert (tmp_path / "memory_parse.tsv").exists()
+    assert set(summary["stages"]) == {"other", "parse"}
+    assert any("parse_date_string" in row["function"] for row in summary["watched_functions"])
+
+
+def test_stage_profiler_memory_is_per_stage(tmp_path):
+    line = sys._getframe().f_lineno
+    before_stage_line = f"test_profiling.py:{line + 5}"
+    in_stage_line = f"test_profiling.py:{line + 7}"
+    profiler = StageProfiler(tmp_path)
+    profiler.start()
+    before_stage = [bytearray(1024) for _ in range(100)]
+    profiler.enter_stage("parse")
+    in_stage = [bytearray(1024) for _ in range(100)]
+    profiler.exit_stage("parse")
+    profiler.stop()
+
+    def locations(stage: str) -> set[str]:
+        lines = (tmp_path / f"memory_{stage}.tsv").read_text().splitlines()[1:]
+        return {line.split("\t")[0] for line in lines}
+
+    assert locations("parse") == {in_stage_line}
+    assert {in_stage_line, before_stage_line} <= locations("other")
+    assert len(before_stage) == len(in_stage)
+
+
+def test_sampling_profiler_summary(tmp_path):
+    profiler = SamplingProfiler(tmp_path)
+    profiler.samples.update(
+        {
+            "xml_parse;main.py:main;utils.py:convert_xml_element_to_dict": 3,
+            "other;main.py:main": 1,
+        }
+    )
+
+    summary = profiler.summary()
+
+    assert summary["samples"] == 4
+    assert summary["stages"] == {"xml_parse": 3, "other": 1}
+    assert summary["top_functions"][0] == {
+        "function": "utils.py:convert_xml_element_to_dict",
+        "own_percent": 75.0,
+        "total_percent": 75.0,
+    }
+
+
+def test_profile_run_listens_to_metric_stages(tmp_path):
+    args = Namespace(profile=tmp_path, profile_mode="cpu", profile_interval=0.01)
+
+    with profile_run(args):
+        with metrics.stage("xml_parse"):
+            parse_date_string("12/10/2023")
+
+    assert metrics.stage_listeners == []
+    assert "xml_parse" in json.loads((tmp_path / "summary.json").read_text())["stages"]
@@ -0,0 +1,308 @@
+import json
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.batch import FnetDocumentoBatch
+from src.database.benchmark import make_api_records
+from src.database.cache import QueryCache, cached_query
+from src.database.changefeed import CHANNEL, RENDIMENTO_CHANNEL
+from src.database.models import RendimentoModel, bulk_upsert_fnet_documentos, upsert_rendimento
+from src.database.partitions import ensure_partitions
+from src.database.queries import (
+    DEFAULT_PAGE_SIZE,
+    fetch_documents,
+    fetch_rendimentos,
+    query_cache,
+)
+from src.database.utils import create_db_connection, get_db_engine
+from src.rendimentos.rendimentos import store_rendimentos
+from src.validators import DadosEconomicoFinanceiros, DadosGerais, InformeRendimentos, Rendimento
+
+
+@pytest.fixture
+def db_session(tmp_path):
+    engine = get_db_engine(f"sqlite:///{tmp_path / 'fiis.db'}")
+    ensure_partitions(engine)
+    query_cache.invalidate()
+
+    with create_db_connection(engine) as db_session:
+        bulk_upsert_fnet_documentos(
+            db_session, FnetDocumentoBatch.from_api_records(make_api_records(5))
+        )
+        db_session.commit()
+        yield db_session
+
+
+def test_fetch_documents_keyset_pagination(db_session):
+    pages = [fetch_documents(db_session, limit=2)]
+    while pages[-1].next_cursor:
+        pages.append(fetch_documents(db_session, limit=2, cursor=pages[-1].next_cursor))
+
+    ids = [document.document_id for page in pages for document in page.items]
+    assert ids == [-5, -4, -3, -2, -1]
+    assert pages[0].next_cursor == (datetime(2023, 1, 1, 0, 3), -4)
+
+
+def test_fetch_documents_cursor_from_json(db_session):
+    page = fetch_documents(db_session, limit=2)
+    cursor = json.loads(page.model_dump_json())["next_cursor"]
+
+    assert cursor == ["2023-01-01T00:03:00", -4]
+    assert fetch_documents(db_session, limit=2, cursor=cursor) is fetch_documents(
+        db_session, limit=2, cursor=page.next_cursor
+    )
+
+
+def test_fetch_documents_filters(db_session):
+    page = fetch_documents(db_session, ticker="bnch00211", tipo_documento="Informe Mensal")
+
+    assert [document.document_id for document in page.items] == [-3]
+    assert page.next_cursor is None
+
+
+@pytest.mark.parametrize("ticker", ["BNCH0021", "NCH00211", "BNCH%", "BNCH0021_"])
+def test_fetch_documents_ticker_matches_whole_codes(db_session, ticker):
+    assert fetch_documents(db_session, ticker=ticker).items == ()
+
+
+def test_fetch_documents_cache_is_invalidated_on_commit(db_session):
+    query_cache.attach(db_session)
+    first = fetch_documents(db_session, limit=2)
+
+    assert fetch_documents(db_session, limit=2) is first
+
+    db_session.commit()
+    assert fetch_documents(db_session, limit=2) is not first
+
+
+def test_cached_pages_are_immutable(db_session):
+    page = fetch_documents(db_session, limit=2)
+
+    with pytest.raises(ValidationError):
+        page.items[0].versao = 3
+    with pytest.raises(ValidationError):
+        page.next_cursor = None
+    assert isinstance(page.items, tuple)
+
+
+def test_cached_query_skips_unhashable_arguments(db_session):
+    cache = QueryCache()
+    calls = []
+
+    @cached_query(cache)
+    def count_calls(session, values):
+        calls.append(values)
+        return len(calls)
+
+    assert count_calls(db_session, [1]) == 1
+    assert count_calls(db_session, [1]) == 2
+    assert len(cache) == 0
+
+
+def test_cached_query_shares_entries_between_positional_and_keyword_calls(db_session):
+    first = fetch_documents(db_session, "BNCH00211")
+
+    assert fetch_documents(db_session, ticker="BNCH00211") is first
+    assert fetch_documents(db_session, ticker="BNCH00211", limit=DEFAULT_PAGE_SIZE) is first
+    assert fetch_documents(db_session, ticker="BNCH00212") is not first
+
+
+def test_fetch_documents_with_session_bound_to_a_connection(db_session):
+    with db_session.get_bind().connect() as connection:
+        page = fetch_documents(Session(bind=connection), limit=2)
+
+    assert page is fetch_documents(db_session, limit=2)
+
+
+class NotifyingConnection:
+    """Delivers `notifications` on the first poll and drops the connection on the second."""
+
+    def __init__(self, notifications: list[SimpleNamespace]):
+        self.notifications = notifications
+        self.notifies: list[SimpleNamespace] = []
+        self.listened: list[str] = []
+        self.dbapi_connection = self
+
+    def detach(self):
+        pass
+
+    def set_isolation_level(self, level: int):
+        pass
+
+    @contextmanager
+    def cursor(self):
+        yield SimpleNamespace(execute=self.listened.append)
+
+    def poll(self):
+        if not self.notifications:
+            raise ConnectionError("server closed the connection")
+        self.notifies, self.notifications = self.notifications, []
+
+    def close(self):
+        pass
+
+
+def test_query_cache_listens_for_document_and_dividend_changes(monkeypatch):
+    connection = NotifyingConnection(
+        [
+            SimpleNamespace(channel=CHANNEL, payload="{}"),
+            SimpleNamespace(channel=RENDIMENTO_CHANNEL, payload="1"),
+        ]
+    )
+    invalidations = []
+    cache = QueryCache()
+    monkeypatch.setattr(cache, "invalidate", lambda: invalidations.append(None))
+    monkeypatch.setattr(
+        "src.database.changefeed.select.select", lambda *args: ([connection], [], [])
+    )
+
+    engine = SimpleNamespace(raw_connection=lambda: connection)
+
+    cache.listen_for_changes(engine).join()  # type: ignore[arg-type]
+
+    assert connection.listened == [f'LISTEN "{CHANNEL}"', f'LISTEN "{RENDIMENTO_CHANNEL}"']
+    assert len(invalidations) == 2
+
+
+def test_query_cache_lru_and_ttl(monkeypatch):
+    cache = QueryCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+
+    monkeypatch.setattr("src.database.cache.time.monotonic", lambda: float("inf"))
+    assert cache.get("a") == (False, None)
+
+
+def make_dados(ticker: str, cnpj_fundo: str, data_base: str, valor: str = "0.85"):
+    return DadosEconomicoFinanceiros(
+        dados_gerais=DadosGerais(
+            NomeFundo=f"FII {ticker}",
+            CNPJFundo=cnpj_fundo,
+            NomeAdministrador="ADMINISTRADOR",
+            CNPJAdministrador="00000000000100",
+            ResponsavelInformacao="RI",
+            TelefoneContato="0",
+            CodISINCota=f"BR{ticker}",
+            CodNegociacaoCota=ticker,
+        ),
+        informe_rendimentos=InformeRendimentos(
+            rendimento=Rendimento(
+                DataBase=data_base,
+                DataPagamento=data_base,
+                ValorProventoCota=valor,
+                PeriodoReferencia="Mensal",
+                Ano=data_base[:4],
+                RendimentoIsentoIR=True,
+            )
+        ),
+    )
+
+
+RENDIMENTOS = {
+    1: make_dados("AAAA11", "11111111000111", "2023-09-29"),
+    2: make_dados("BBBB11", "22222222000122", "2023-09-29"),
+    3: make_dados("AAAA11", "11111111000111", "2023-10-31"),
+    4: make_dados("AAAA11", "11111111000111", "2023-11-30"),
+}
+
+
+@pytest.fixture
+def rendimento_session(tmp_path):
+    engine = get_db_engine(f"sqlite:///{tmp_path / 'fiis.db'}")
+    ensure_partitions(engine)
+    query_cache.invalidate()
+
+    with create_db_connection(engine) as db_session:
+        for document_id, dados in RENDIMENTOS.items():
+            upsert_rendimento(db_session, document_id, dados)
+        db_session.commit()
+        yield db_session
+
+
+def test_upsert_rendimento_is_idempotent(rendimento_session):
+    upsert_rendimento(rendimento_session, 3, make_dados("AAAA11", "11111111000111", "2023-10-31"))
+    upsert_rendimento(
+        rendimento_session, 4, make_dados("AAAA11", "11111111000111", "2023-11-30", "0.9")
+    )
+    rendimento_session.commit()
+
+    rows = rendimento_session.scalars(select(RendimentoModel).order_by("document_id")).all()
+    assert [row.document_id for row in rows] == [1, 2, 3, 4]
+    assert [row.valor_provento_cota for row in rows] == [Decimal("0.85")] * 3 + [Decimal("0.9")]
+
+
+def test_upsert_rendimento_skips_reports_without_rendimento(rendimento_session):
+    dados = RENDIMENTOS[1].model_copy(update={"informe_rendimentos": InformeRendimentos()})
+
+    assert upsert_rendimento(rendimento_session, 5, dados) is None
+
+
+@pytest.mark.parametrize(
+    "filters, expected_ids",
+    [
+        ({"ticker": "aaaa11"}, [1, 3, 4]),
+        ({"cnpj_fundo": "22222222000122"}, [2]),
+        ({"start": date(2023, 10, 31), "end": date(2023, 11, 30)}, [3, 4]),
+        ({"end": date(2023, 9, 29)}, [1, 2]),
+        ({"ticker": "AAAA11", "start": date(2023, 10, 1)}, [3, 4]),
+        ({"ticker": "AAAA1"}, []),
+    ],
+)
+def test_fetch_rendimentos_filters(rendimento_session, filters, expected_ids):
+    page = fetch_rendimentos(rendimento_session, **filters)
+
+    assert [rendimento.document_id for rendimento in page.items] == expected_ids
+    assert page.next_cursor is None
+
+
+def test_fetch_rendimentos_keyset_pagination(rendimento_session):
+    pages = [fetch_rendimentos(rendimento_session, limit=1)]
+    while pages[-1].next_cursor:
+        pages.append(fetch_rendimentos(rendimento_session, limit=1, cursor=pages[-1].next_cursor))
+
+    ids = [rendimento.document_id for page in pages for rendimento in page.items]
+    assert ids == [1, 2, 3, 4]
+    assert [page.next_cursor for page in pages] == [
+        (date(2023, 9, 29), 1),
+        (date(2023, 9, 29), 2),
+        (date(2023, 10, 31), 3),
+        None,
+    ]
+
+
+def test_store_rendimentos_only_stores_downloaded_reports(rendimento_session):
+    dados = make_dados("CCCC11", "33333333000133", "2023-12-29")
+    store_rendimentos(
+        rendimento_session,
+        [(Path("5.xml"), dados), (Path("relatorio.xml"), dados), (Path("6.xml"), dados)],
+    )
+
+    page = fetch_rendimentos(rendimento_session, ticker="CCCC11")
+    assert [rendimento.document_id for rendimento in page.items] == [5, 6]
+
+
+def test_store_rendimentos_notifies_stored_dividends_on_postgres(rendimento_session, monkeypatch):
+    notified = []
+    monkeypatch.setattr("src.rendimentos.rendimentos.is_postgres", lambda connection: True)
+    monkeypatch.setattr(
+        "src.rendimentos.rendimentos.notify_rendimentos",
+        lambda session, document_ids: notified.append(document_ids),
+    )
+    dados = make_dados("CCCC11", "33333333000133", "2023-12-29")
+
+    store_rendimentos(rendimento_session, [(Path("5.xml"), dados), (Path("relatorio.xml"), dados)])
+
+    assert notified == [[5]]